@@ -10,9 +10,12 @@ import logging
 import os
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 import uvicorn
 
+from src.utils.log_queue import setup_queue_logging
+
 # Import security middleware
 try:
     from api.middleware.security import add_security_middleware
@@ -26,11 +29,8 @@ except ImportError:
     # When running directly
     from routers import process, jobs
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+# Configure logging; records are formatted and written on a background thread
+setup_queue_logging()
 logger = logging.getLogger(__name__)
 
 # Create FastAPI application
@@ -38,25 +38,36 @@ app = FastAPI(
     title="Owl OCR API",
     description="API for OCR and text extraction from various document formats",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
+# Allowed CORS origins, comma separated (defaults to the bundled frontends)
+CORS_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("CORS_ORIGINS", "http://localhost:8050,http://localhost:8501").split(",")
+    if origin.strip()
+]
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # For production, replace with specific origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=CORS_ORIGINS,
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["authorization", "content-type"],
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
 
+# Compress large responses (e.g. ProcessingResult payloads)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Add security middleware
 add_security_middleware(app)
 
 # Create global exception handler for all exceptions
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
-    return JSONResponse(
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
+    return ORJSONResponse(
         status_code=500,
         content={"message": "An error occurred processing the request", "detail": str(exc)},
     )
@@ -77,4 +88,12 @@ async def health_check():
 if __name__ == "__main__":
     # For local development - not used in production with proper ASGI server
     port = int(os.getenv("PORT", "8000"))
-    uvicorn.run("api.main:app", host="0.0.0.0", port=port, reload=True)
\ No newline at end of file
+    uvicorn.run(
+        "api.main:app",
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        reload=False,
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+    )
\ No newline at end of file
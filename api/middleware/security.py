@@ -4,17 +4,15 @@ Security middleware for API protection.
 Implements rate limiting and security headers.
 """
 
+import itertools
+import logging
 import os
 import time
-from typing import Callable, Dict
+from typing import Dict, List, Tuple
 
-from fastapi import FastAPI, Request, Response
-try:
-    from starlette.middleware.base import BaseHTTPMiddleware
-except ImportError:
-    from fastapi.middleware.base import BaseHTTPMiddleware
-from starlette.middleware.base import RequestResponseEndpoint
-from starlette.responses import JSONResponse
+import redis.asyncio as aioredis
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 
 # Rate limiting configuration
@@ -22,105 +20,207 @@ RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
 RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "60"))  # in seconds
 RATE_LIMIT_MAX_REQUESTS = int(os.getenv("RATE_LIMIT_MAX_REQUESTS", "100"))  # per window
 
-# Simple in-memory store for rate limiting
-# In production, this should use Redis or another distributed cache
-rate_limit_store: Dict[str, Dict[str, int]] = {}
+RATE_LIMIT_REFILL_RATE = RATE_LIMIT_MAX_REQUESTS / RATE_LIMIT_WINDOW  # tokens per second
 
+# Shared rate limit state lives in Redis when REDIS_URL is set, so limits hold
+# across uvicorn workers and idle clients expire automatically
+RATE_LIMIT_REDIS_URL = os.getenv("REDIS_URL")
+RATE_LIMIT_PREFIX = "ocr:ratelimit:"
 
-class SecurityMiddleware(BaseHTTPMiddleware):
-    """Middleware for implementing security features."""
-    
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
+# After a Redis error, how long to use the in-memory store before trying Redis again
+RATE_LIMIT_REDIS_RETRY_SECONDS = float(os.getenv("RATE_LIMIT_REDIS_RETRY_SECONDS", "30"))
+
+# Rolling-window limiter executed atomically on the Redis server
+# KEYS[1] = client key, ARGV = now_ms, window_ms, max_requests, member
+RATE_LIMIT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, tonumber(ARGV[1]) - tonumber(ARGV[2]))
+local count = redis.call('ZCARD', KEYS[1])
+if count >= tonumber(ARGV[3]) then
+    return 1
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+return 0
+"""
+
+# Fallback in-memory token bucket store: client IP -> (tokens, last monotonic timestamp)
+# Only used when Redis is not configured or unreachable
+rate_limit_store: Dict[str, Tuple[float, float]] = {}
+
+# Health check endpoints polled by load balancers skip rate limiting and headers
+BYPASS_PATHS = frozenset({"/", "/api/health"})
+
+# Headers added to every HTTP response, pre-encoded for the raw ASGI message
+SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"content-security-policy", b"default-src 'self'"),
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+]
+
+# Upload size limit enforced from the Content-Length header (default: 100 MB)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+
+# Pre-built 429 response
+RATE_LIMIT_BODY = b'{"detail":"Too many requests. Please try again later."}'
+RATE_LIMIT_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(RATE_LIMIT_BODY)).encode("latin-1")),
+    (b"retry-after", str(RATE_LIMIT_WINDOW).encode("latin-1")),
+]
+
+# Pre-built 413 response
+TOO_LARGE_BODY = b'{"detail":"Request body too large."}'
+TOO_LARGE_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(TOO_LARGE_BODY)).encode("latin-1")),
+    (b"connection", b"close"),
+]
+
+
+logger = logging.getLogger(__name__)
+
+
+class SecurityMiddleware:
+    """Pure ASGI middleware for implementing security features."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._member_ids = itertools.count()
+        self._rate_limit_script = None
+        # Monotonic time until which Redis is skipped after an error; 0 while healthy
+        self._redis_retry_at = 0.0
+        if RATE_LIMIT_REDIS_URL:
+            redis_client = aioredis.from_url(RATE_LIMIT_REDIS_URL)
+            self._rate_limit_script = redis_client.register_script(RATE_LIMIT_SCRIPT)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         Process request through security middleware.
-        
+
         Args:
-            request: Incoming request
-            call_next: Next middleware or endpoint
-            
-        Returns:
-            Response with security headers and rate limiting
+            scope: ASGI connection scope
+            receive: ASGI receive channel
+            send: ASGI send channel
         """
+        # Pass through non-HTTP traffic, CORS preflights and health probes untouched
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or scope["path"] in BYPASS_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        # Reject oversized uploads before the body is read
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > MAX_UPLOAD_BYTES:
+                    await self._send_error(send, 413, TOO_LARGE_HEADERS, TOO_LARGE_BODY)
+                    return
+                break
+
         # Check rate limit if enabled
-        if RATE_LIMIT_ENABLED and request.method != "OPTIONS":
-            client_ip = request.client.host if request.client else "unknown"
-            
+        if RATE_LIMIT_ENABLED:
+            client = scope.get("client")
+            client_ip = client[0] if client else "unknown"
+
             # Check if client is rate limited
-            if self._is_rate_limited(client_ip):
-                return JSONResponse(
-                    status_code=429,
-                    content={"detail": "Too many requests. Please try again later."},
-                    headers={"Retry-After": str(RATE_LIMIT_WINDOW)}
-                )
-            
-            # Update rate limit counter
-            self._update_rate_limit(client_ip)
-        
+            if await self._check_rate_limit(client_ip):
+                await self._send_error(send, 429, RATE_LIMIT_HEADERS, RATE_LIMIT_BODY)
+                return
+
+        async def send_wrapper(message: Message) -> None:
+            # Add security headers
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + SECURITY_HEADERS
+            await send(message)
+
         # Process the request
-        response = await call_next(request)
-        
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["Content-Security-Policy"] = "default-src 'self'"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        
-        return response
-    
-    def _is_rate_limited(self, client_ip: str) -> bool:
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_error(
+        self, send: Send, status: int, headers: List[Tuple[bytes, bytes]], body: bytes
+    ) -> None:
+        """
+        Send a complete error response without invoking the application.
+
+        Args:
+            send: ASGI send channel
+            status: HTTP status code
+            headers: Pre-encoded response headers
+            body: Response body
+        """
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": headers + SECURITY_HEADERS,
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def _check_rate_limit(self, client_ip: str) -> bool:
         """
-        Check if client is rate limited.
-        
+        Check if client is rate limited, preferring the shared Redis store.
+
         Args:
             client_ip: Client IP address
-            
+
         Returns:
             True if client is rate limited, False otherwise
         """
-        now = int(time.time())
-        window_start = now - RATE_LIMIT_WINDOW
-        
-        if client_ip in rate_limit_store:
-            # Clean up old requests
-            rate_limit_store[client_ip] = {
-                ts: count for ts, count in rate_limit_store[client_ip].items() 
-                if int(ts) > window_start
-            }
-            
-            # Count requests in current window
-            total_requests = sum(rate_limit_store[client_ip].values())
-            
-            # Check if limit is exceeded
-            if total_requests >= RATE_LIMIT_MAX_REQUESTS:
-                return True
-        
-        return False
-    
-    def _update_rate_limit(self, client_ip: str) -> None:
+        if self._rate_limit_script is not None and time.monotonic() >= self._redis_retry_at:
+            now_ms = int(time.time() * 1000)
+            try:
+                limited = await self._rate_limit_script(
+                    keys=[f"{RATE_LIMIT_PREFIX}{client_ip}"],
+                    args=[now_ms, RATE_LIMIT_WINDOW * 1000, RATE_LIMIT_MAX_REQUESTS,
+                          f"{now_ms}-{os.getpid()}-{next(self._member_ids)}"],
+                )
+                if self._redis_retry_at:
+                    logger.info("Redis rate limiting restored")
+                    self._redis_retry_at = 0.0
+                return limited == 1
+            except aioredis.RedisError as e:
+                # Log once per outage and stop paying a connection attempt on every request
+                if not self._redis_retry_at:
+                    logger.warning("Redis rate limiting unavailable, using in-memory store: %s", e)
+                self._redis_retry_at = time.monotonic() + RATE_LIMIT_REDIS_RETRY_SECONDS
+
+        return self._is_rate_limited(client_ip)
+
+    def _is_rate_limited(self, client_ip: str) -> bool:
         """
-        Update rate limit counters for client.
-        
+        Check if client is rate limited and consume a token otherwise.
+
+        Uses a token bucket per client: the bucket holds up to
+        RATE_LIMIT_MAX_REQUESTS tokens and refills continuously over
+        RATE_LIMIT_WINDOW seconds, so each check is O(1).
+
         Args:
             client_ip: Client IP address
+
+        Returns:
+            True if client is rate limited, False otherwise
         """
-        now = str(int(time.time()))
-        
-        if client_ip not in rate_limit_store:
-            rate_limit_store[client_ip] = {}
-        
-        if now not in rate_limit_store[client_ip]:
-            rate_limit_store[client_ip][now] = 0
-        
-        rate_limit_store[client_ip][now] += 1
+        now = time.monotonic()
+        tokens, last = rate_limit_store.get(client_ip, (RATE_LIMIT_MAX_REQUESTS, now))
+
+        # Refill tokens for the time elapsed since the last request
+        tokens = min(RATE_LIMIT_MAX_REQUESTS, tokens + (now - last) * RATE_LIMIT_REFILL_RATE)
+
+        if tokens < 1:
+            rate_limit_store[client_ip] = (tokens, now)
+            return True
+
+        rate_limit_store[client_ip] = (tokens - 1, now)
+        return False
 
 
 def add_security_middleware(app: FastAPI) -> None:
     """
     Add security middleware to FastAPI app.
-    
+
     Args:
         app: FastAPI application
     """
-    app.add_middleware(SecurityMiddleware)
\ No newline at end of file
+    app.add_middleware(SecurityMiddleware)
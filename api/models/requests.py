@@ -3,7 +3,7 @@ Request models for the OCR API.
 """
 
 from enum import Enum
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class OutputFormat(str, Enum):
@@ -14,6 +14,8 @@ class OutputFormat(str, Enum):
 
 class ProcessingOptions(BaseModel):
     """Common options for all processing requests."""
+    model_config = ConfigDict(frozen=True)
+    
     output_format: OutputFormat = Field(
         default=OutputFormat.JSON,
         description="Format to return results in. JSON returns all data in the response, FILES stores files on disk and returns paths."
@@ -4,7 +4,17 @@ Response models for the OCR API.
 
 from enum import Enum
 from typing import Dict, List, Optional, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+
+# Shared config for response models: build validators lazily on first use and
+# skip the assignment validator since results are never mutated after creation
+RESPONSE_MODEL_CONFIG = ConfigDict(
+    defer_build=True,
+    extra="ignore",
+    validate_assignment=False,
+    arbitrary_types_allowed=False,
+)
 
 
 class JobStatus(str, Enum):
@@ -17,6 +27,8 @@ class JobStatus(str, Enum):
 
 class JobResponse(BaseModel):
     """Response model for job creation and status."""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     job_id: str = Field(..., description="Unique identifier for the job")
     status: JobStatus = Field(..., description="Current status of the job")
     file_name: str = Field(..., description="Original file name that was processed")
@@ -29,6 +41,8 @@ class JobResponse(BaseModel):
 
 class TextExtraction(BaseModel):
     """Text extraction result model."""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     text: str = Field(..., description="Extracted text content")
     source: str = Field(..., description="Source of the text (e.g., 'page', 'slide', 'image')")
     page_number: Optional[int] = Field(None, description="Page or slide number if applicable")
@@ -36,6 +50,8 @@ class TextExtraction(BaseModel):
 
 class TableExtraction(BaseModel):
     """Table extraction result model."""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     html: str = Field(..., description="Table content as HTML")
     source: str = Field(..., description="Source of the table (e.g., 'page', 'slide')")
     page_number: Optional[int] = Field(None, description="Page or slide number if applicable")
@@ -43,6 +59,8 @@ class TableExtraction(BaseModel):
 
 class ImageFile(BaseModel):
     """Image file reference model."""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     path: str = Field(..., description="Path to the image file")
     source: str = Field(..., description="Source of the image (e.g., 'page', 'slide')")
     page_number: Optional[int] = Field(None, description="Page or slide number if applicable")
@@ -50,6 +68,8 @@ class ImageFile(BaseModel):
 
 class ProcessingResult(BaseModel):
     """Complete processing result model."""
+    model_config = RESPONSE_MODEL_CONFIG
+    
     job_id: str = Field(..., description="Unique identifier for the job")
     file_name: str = Field(..., description="Original file name that was processed")
     file_type: str = Field(..., description="Detected file type")
@@ -3,34 +3,58 @@ Router for job management endpoints.
 """
 
 import logging
+import os
 from typing import List, Optional
 
+import orjson
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 from api.models.responses import JobResponse, ProcessingResult
-from src.jobs.queue import get_job, get_job_result, clean_old_jobs
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+from src.jobs.queue import (
+    clean_old_jobs,
+    get_job,
+    get_job_and_result_summary,
+    get_job_snapshot,
+    iter_result_json,
+    read_job_events,
 )
+from src.utils.thumbnails import make_thumbnail
+
 logger = logging.getLogger(__name__)
 
 # Create router
 router = APIRouter()
 
+# How long the event stream waits for a job update before sending a keep-alive (ms)
+JOB_EVENTS_BLOCK_MS = 15000
+
+# Job statuses after which the event stream ends
+TERMINAL_STATUSES = frozenset({"completed", "failed"})
+
+# Generated image thumbnails, cached on disk as <THUMBNAIL_DIR>/<job_id>/<index>.webp
+THUMBNAIL_DIR = os.getenv("THUMBNAIL_DIR", "thumbs")
+
+# A thumbnail never changes once generated, so browsers may cache it for a day
+THUMBNAIL_HEADERS = {"Cache-Control": "public, max-age=86400, immutable"}
+
 
 @router.get(
     "/jobs/{job_id}",
-    response_model=JobResponse,
+    response_model=None,
+    response_class=ORJSONResponse,
+    responses={200: {"model": JobResponse}},
     summary="Get job status",
     description="Get the status of a job by its ID",
 )
-async def get_job_status(job_id: str) -> JobResponse:
+async def get_job_status(job_id: str) -> ORJSONResponse:
     """
     Get the status of a job.
     
+    The job data comes from our own Redis store, so it is returned as-is
+    without re-validating it against JobResponse.
+    
     Args:
         job_id: Unique job identifier
         
@@ -39,25 +63,78 @@ async def get_job_status(job_id: str) -> JobResponse:
     """
     try:
         job_data = get_job(job_id)
-        return JobResponse(**job_data)
+        return ORJSONResponse(job_data)
     except HTTPException as e:
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        logger.error(f"Error getting job status: {str(e)}")
+        logger.error("Error getting job status: %s", e)
         raise HTTPException(status_code=500, detail=f"Error getting job status: {str(e)}")
 
 
+@router.get(
+    "/jobs/{job_id}/events",
+    response_class=StreamingResponse,
+    summary="Stream job status",
+    description="Stream job status changes as server-sent events until the job finishes",
+)
+async def stream_job_events(job_id: str) -> StreamingResponse:
+    """
+    Stream job status changes as server-sent events.
+    
+    Each event carries the full job data. Updates are pushed from the job's
+    Redis event stream, so neither the client nor the server polls.
+    
+    Args:
+        job_id: Unique job identifier
+        
+    Returns:
+        text/event-stream response that ends once the job completes or fails
+    """
+    # Raises 404 before the stream starts if the job does not exist
+    job_data, last_id = await run_in_threadpool(get_job_snapshot, job_id)
+    
+    async def events():
+        nonlocal last_id
+        data = job_data
+        yield b"data: " + orjson.dumps(data) + b"\n\n"
+        while data["status"] not in TERMINAL_STATUSES:
+            updates = await read_job_events(job_id, last_id, JOB_EVENTS_BLOCK_MS)
+            if not updates:
+                try:
+                    await run_in_threadpool(get_job, job_id)
+                except HTTPException:
+                    # Job expired while we were watching it
+                    return
+                # Keep idle connections open through proxies
+                yield b": keep-alive\n\n"
+                continue
+            for last_id, fields in updates:
+                data = {**data, **fields}
+            yield b"data: " + orjson.dumps(data) + b"\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
 @router.get(
     "/jobs/{job_id}/result",
-    response_model=ProcessingResult,
+    response_model=None,
+    response_class=StreamingResponse,
+    responses={200: {"model": ProcessingResult, "content": {"application/json": {}}}},
     summary="Get job result",
     description="Get the result of a completed job by its ID",
 )
-async def get_job_results(job_id: str) -> ProcessingResult:
+async def get_job_results(job_id: str) -> StreamingResponse:
     """
     Get the result of a job.
     
+    The result is stored as JSON by the worker, so it is streamed straight
+    from Redis a page at a time without being decoded and re-encoded.
+    
     Args:
         job_id: Unique job identifier
         
@@ -65,8 +142,8 @@ async def get_job_results(job_id: str) -> ProcessingResult:
         Job processing result
     """
     try:
-        # First check job status
-        job_data = get_job(job_id)
+        # Fetch job status and result in a single Redis round-trip
+        job_data, result = get_job_and_result_summary(job_id)
         
         # Check if job is completed
         if job_data["status"] != "completed":
@@ -77,21 +154,62 @@ async def get_job_results(job_id: str) -> ProcessingResult:
                 )
             else:
                 raise HTTPException(
-                    status_code=102, 
+                    status_code=409,
                     detail=f"Job {job_id} is still {job_data['status']}. Current progress: {job_data.get('progress', 0)}%"
                 )
         
-        # Get results
-        result = get_job_result(job_id)
-        return ProcessingResult(**result)
+        if result is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Result not available yet for job {job_id}"
+            )
+        
+        return StreamingResponse(iter_result_json(job_id, result), media_type="application/json")
     except HTTPException as e:
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        logger.error(f"Error getting job result: {str(e)}")
+        logger.error("Error getting job result: %s", e)
         raise HTTPException(status_code=500, detail=f"Error getting job result: {str(e)}")
 
 
+@router.get(
+    "/jobs/{job_id}/thumb/{index}",
+    response_class=FileResponse,
+    summary="Get image thumbnail",
+    description="Get a small WebP thumbnail of one of a job's extracted images",
+)
+async def get_image_thumbnail(job_id: str, index: int) -> FileResponse:
+    """
+    Get a thumbnail of an extracted image, generating it on first request.
+    
+    Args:
+        job_id: Unique job identifier
+        index: Position of the image in the job result's images list
+        
+    Returns:
+        WebP thumbnail file
+    """
+    # Job IDs are hex tokens; anything else must not reach the filesystem
+    if not job_id.isalnum():
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    thumb_path = os.path.join(THUMBNAIL_DIR, job_id, f"{index}.webp")
+    if not os.path.isfile(thumb_path):
+        _, summary = await run_in_threadpool(get_job_and_result_summary, job_id)
+        images = orjson.loads(summary).get("images", []) if summary else []
+        if not 0 <= index < len(images):
+            raise HTTPException(status_code=404, detail=f"Image {index} not found for job {job_id}")
+        
+        try:
+            await run_in_threadpool(make_thumbnail, images[index]["path"], thumb_path)
+        except OSError as e:
+            logger.error("Error creating thumbnail for job %s image %d: %s", job_id, index, e)
+            raise HTTPException(status_code=404, detail=f"Image {index} is not available for job {job_id}")
+    
+    return FileResponse(thumb_path, media_type="image/webp", headers=THUMBNAIL_HEADERS)
+
+
 @router.delete(
     "/jobs/{job_id}",
     response_model=dict,
@@ -121,7 +239,7 @@ async def delete_job(job_id: str) -> dict:
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        logger.error(f"Error deleting job: {str(e)}")
+        logger.error("Error deleting job: %s", e)
         raise HTTPException(status_code=500, detail=f"Error deleting job: {str(e)}")
 
 
@@ -142,5 +260,5 @@ async def cleanup_jobs() -> dict:
         count = clean_old_jobs()
         return {"status": "success", "message": f"Cleaned up {count} old jobs"}
     except Exception as e:
-        logger.error(f"Error cleaning up jobs: {str(e)}")
+        logger.error("Error cleaning up jobs: %s", e)
         raise HTTPException(status_code=500, detail=f"Error cleaning up jobs: {str(e)}")
\ No newline at end of file
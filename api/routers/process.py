@@ -5,25 +5,24 @@ Router for file processing endpoints.
 import asyncio
 import logging
 import os
+import secrets
 import shutil
 import tempfile
-import uuid
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import BinaryIO, List, Optional
 
-from fastapi import APIRouter, BackgroundTasks, File, Form, HTTPException, UploadFile
-from fastapi.responses import JSONResponse
+import aiofiles
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, UploadFile
+from pydantic import ValidationError
+from starlette.formparsers import MultiPartParser
 
 from api.models.requests import OutputFormat, ProcessingOptions
 from api.models.responses import JobResponse
-from src.jobs.queue import create_job
-from src.jobs.worker import process_file, get_file_type
+from src.jobs.queue import OCR_TASK_QUEUE, create_job, enqueue_job
+from src.jobs.worker import process_file
+from src.utils.tesseract import init_ocr_process
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
 logger = logging.getLogger(__name__)
 
 # Create router
@@ -32,39 +31,112 @@ router = APIRouter()
 # Directory for uploaded files
 UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(os.getcwd(), "uploads"))
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+UPLOAD_PATH = Path(UPLOAD_DIR)
+
+# Root directory for output files when output_format is "files"
+PARSED_ROOT = Path("parsed_docs")
+
+# Dedicated process pool for CPU-bound OCR work, sized to the available cores
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+OCR_POOL = ProcessPoolExecutor(max_workers=OCR_WORKERS, initializer=init_ocr_process)
+
+# Shared default options; ProcessingOptions is frozen so the instance can be reused
+DEFAULT_PROCESSING_OPTIONS = ProcessingOptions()
+
+# Chunk size used when streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Supported file extensions per file type
+_IMG_EXTS = frozenset({".png", ".jpg", ".jpeg"})
+_PDF_EXTS = frozenset({".pdf"})
+_PPT_EXTS = frozenset({".pptx", ".ppt"})
+
+# Extension to file type lookup used to validate and classify uploads in one step
+EXT_TO_TYPE = {
+    **dict.fromkeys(_IMG_EXTS, "image"),
+    **dict.fromkeys(_PDF_EXTS, "pdf"),
+    **dict.fromkeys(_PPT_EXTS, "pptx"),
+}
+
+# Error details for endpoints restricted to a single file type
+INVALID_TYPE_MESSAGES = {
+    "image": "Invalid file type. Only PNG and JPEG images are supported.",
+    "pdf": "Invalid file type. Only PDF files are supported.",
+    "pptx": "Invalid file type. Only PPTX and PPT files are supported.",
+}
+
+# Human-readable file type names used in error messages
+FILE_TYPE_LABELS = {
+    "image": "image",
+    "pdf": "PDF",
+    "pptx": "PowerPoint",
+}
 
 
-async def save_upload_file(upload_file: UploadFile) -> str:
+def _sendfile_copy(src: BinaryIO, file_path: str) -> None:
+    """
+    Copy a disk-backed file to file_path, in the kernel with os.sendfile where supported.
+    
+    os.sendfile into a regular file only works on Linux; elsewhere (or if the call
+    fails) the file is copied in chunks instead.
+    
+    Args:
+        src: Open file object backed by a real file descriptor
+        file_path: Destination path
+    """
+    with open(file_path, "wb") as dst:
+        if hasattr(os, "sendfile"):
+            src_fd = src.fileno()
+            size = os.fstat(src_fd).st_size
+            offset = 0
+            try:
+                while offset < size:
+                    sent = os.sendfile(dst.fileno(), src_fd, offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                return
+            except OSError:
+                # e.g. ENOTSOCK on macOS; start over with a plain copy
+                dst.seek(0)
+                dst.truncate()
+        src.seek(0)
+        shutil.copyfileobj(src, dst, UPLOAD_CHUNK_SIZE)
+
+
+async def save_upload_file(upload_file: UploadFile, job_id: str) -> str:
     """
     Save an uploaded file to disk.
     
     Args:
         upload_file: File uploaded by the user
+        job_id: Job identifier used to prefix the stored file name
         
     Returns:
         Path to the saved file
     """
-    # Create unique filename to avoid collisions
-    file_id = uuid.uuid4().hex
-    filename = f"{file_id}_{upload_file.filename}"
-    file_path = os.path.join(UPLOAD_DIR, filename)
+    # Prefix with the job ID to avoid collisions; strip any path components
+    filename = f"{job_id}_{Path(upload_file.filename).name}"
+    file_path = str(UPLOAD_PATH / filename)
     
     # Save file to disk
     try:
-        # Create upload directory if it doesn't exist
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        
-        # Write file
-        with open(file_path, "wb") as f:
-            shutil.copyfileobj(upload_file.file, f)
+        if upload_file.size is not None and upload_file.size > MultiPartParser.spool_max_size:
+            # Upload already spilled to a temp file; copy it off the event loop
+            await asyncio.to_thread(_sendfile_copy, upload_file.file, file_path)
+        else:
+            # Small in-memory upload: write it in chunks without blocking the event loop
+            async with aiofiles.open(file_path, "wb") as f:
+                while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
             
         return file_path
     
     except Exception as e:
-        logger.error(f"Error saving file {filename}: {str(e)}")
+        logger.error("Error saving file %s: %s", filename, e)
         raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
     finally:
-        upload_file.file.close()
+        await upload_file.close()
 
 
 async def process_file_background(
@@ -85,10 +157,10 @@ async def process_file_background(
         output_dir: Directory to store output files
     """
     try:
-        # Run the processing in a separate thread/process to avoid blocking
-        loop = asyncio.get_event_loop()
+        # Run the processing in the dedicated OCR process pool to avoid blocking
+        loop = asyncio.get_running_loop()
         await loop.run_in_executor(
-            None,  # Default executor
+            OCR_POOL,
             process_file,
             job_id,
             file_path,
@@ -97,67 +169,91 @@ async def process_file_background(
             output_dir
         )
     except Exception as e:
-        logger.error(f"Error in background processing for job {job_id}: {str(e)}")
+        logger.error("Error in background processing for job %s: %s", job_id, e)
         # Job status is already updated by process_file
 
 
-@router.post(
-    "/process",
-    response_model=JobResponse,
-    summary="Process a file with automatic format detection",
-    description="Upload a file for OCR processing with automatic format detection based on file extension",
-)
-async def process_file_auto(
+def parsed_options(options: Optional[str] = Form(None)) -> ProcessingOptions:
+    """
+    Parse the JSON-encoded options form field.
+    
+    Args:
+        options: JSON string with processing options
+        
+    Returns:
+        Parsed processing options, or defaults if missing or invalid
+    """
+    if not options:
+        return DEFAULT_PROCESSING_OPTIONS
+    try:
+        return ProcessingOptions.model_validate_json(options)
+    except ValidationError as e:
+        logger.error("Error parsing options: %s", e)
+        return DEFAULT_PROCESSING_OPTIONS
+
+
+async def _process(
     background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
-    options: Optional[str] = Form(None),
+    file: UploadFile,
+    processing_options: ProcessingOptions,
+    forced_type: Optional[str] = None,
 ) -> JobResponse:
     """
-    Process a file with automatic format detection.
+    Shared implementation for all processing endpoints.
+    
+    Args:
+        background_tasks: FastAPI background task manager
+        file: File uploaded by the user
+        processing_options: Parsed processing options
+        forced_type: File type required by the endpoint, or None to auto-detect
+        
+    Returns:
+        Job data for the created job
     """
-    # Parse options or use defaults
-    if options:
-        import json
-        try:
-            options_dict = json.loads(options)
-            processing_options = ProcessingOptions(**options_dict)
-        except Exception as e:
-            logger.error(f"Error parsing options: {str(e)}")
-            processing_options = ProcessingOptions()
-    else:
-        processing_options = ProcessingOptions()
+    # Detect file type from the original file name
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    file_type = EXT_TO_TYPE.get(ext)
+    if forced_type is not None and file_type != forced_type:
+        raise HTTPException(status_code=400, detail=INVALID_TYPE_MESSAGES[forced_type])
+    if not file_type:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type: {ext}"
+        )
     
     try:
-        # Save uploaded file
-        file_path = await save_upload_file(file)
-        
-        # Detect file type
-        file_type = get_file_type(file_path)
-        if not file_type:
-            os.remove(file_path)  # Clean up
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported file type: {Path(file.filename).suffix}"
-            )
+        # Save uploaded file under the job ID it will be tracked by
+        job_id = secrets.token_hex(16)
+        file_path = await save_upload_file(file, job_id)
         
         # Create job
-        job_data = create_job(file.filename, file_type)
-        job_id = job_data["job_id"]
+        job_data = create_job(file.filename, file_type, job_id=job_id)
         
         # Determine output directory if needed
         output_dir = None
         if processing_options.output_format == OutputFormat.FILES:
-            output_dir = os.path.join("parsed_docs", job_id)
+            output_dir = str(PARSED_ROOT / job_id)
         
-        # Start background processing
-        background_tasks.add_task(
-            process_file_background,
-            job_id,
-            file_path,
-            file_type,
-            processing_options.output_format,
-            output_dir
-        )
+        # Start background processing, on the RQ workers if configured
+        if OCR_TASK_QUEUE:
+            enqueue_job(
+                job_id,
+                process_file,
+                job_id,
+                file_path,
+                file_type,
+                processing_options.output_format,
+                output_dir
+            )
+        else:
+            background_tasks.add_task(
+                process_file_background,
+                job_id,
+                file_path,
+                file_type,
+                processing_options.output_format,
+                output_dir
+            )
         
         # Return job data
         return JobResponse(**job_data)
@@ -166,8 +262,26 @@ async def process_file_auto(
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        logger.error(f"Error processing file: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+        label = FILE_TYPE_LABELS.get(forced_type, "file")
+        logger.error("Error processing %s: %s", label, e)
+        raise HTTPException(status_code=500, detail=f"Error processing {label}: {str(e)}")
+
+
+@router.post(
+    "/process",
+    response_model=JobResponse,
+    summary="Process a file with automatic format detection",
+    description="Upload a file for OCR processing with automatic format detection based on file extension",
+)
+async def process_file_auto(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    processing_options: ProcessingOptions = Depends(parsed_options),
+) -> JobResponse:
+    """
+    Process a file with automatic format detection.
+    """
+    return await _process(background_tasks, file, processing_options)
 
 
 @router.post(
@@ -179,62 +293,12 @@ async def process_file_auto(
 async def process_image_file(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    options: Optional[str] = Form(None),
+    processing_options: ProcessingOptions = Depends(parsed_options),
 ) -> JobResponse:
     """
     Process an image file for OCR.
     """
-    # Check file type
-    if not file.filename.lower().endswith((".png", ".jpg", ".jpeg")):
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid file type. Only PNG and JPEG images are supported."
-        )
-    
-    # Parse options or use defaults
-    if options:
-        import json
-        try:
-            options_dict = json.loads(options)
-            processing_options = ProcessingOptions(**options_dict)
-        except Exception as e:
-            logger.error(f"Error parsing options: {str(e)}")
-            processing_options = ProcessingOptions()
-    else:
-        processing_options = ProcessingOptions()
-    
-    try:
-        # Save uploaded file
-        file_path = await save_upload_file(file)
-        
-        # Create job
-        job_data = create_job(file.filename, "image")
-        job_id = job_data["job_id"]
-        
-        # Determine output directory if needed
-        output_dir = None
-        if processing_options.output_format == OutputFormat.FILES:
-            output_dir = os.path.join("parsed_docs", job_id)
-        
-        # Start background processing
-        background_tasks.add_task(
-            process_file_background,
-            job_id,
-            file_path,
-            "image",
-            processing_options.output_format,
-            output_dir
-        )
-        
-        # Return job data
-        return JobResponse(**job_data)
-    
-    except HTTPException as e:
-        # Re-raise HTTP exceptions
-        raise
-    except Exception as e:
-        logger.error(f"Error processing image: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing image: {str(e)}")
+    return await _process(background_tasks, file, processing_options, "image")
 
 
 @router.post(
@@ -246,62 +310,12 @@ async def process_image_file(
 async def process_pdf_file(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    options: Optional[str] = Form(None),
+    processing_options: ProcessingOptions = Depends(parsed_options),
 ) -> JobResponse:
     """
     Process a PDF file.
     """
-    # Check file type
-    if not file.filename.lower().endswith(".pdf"):
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid file type. Only PDF files are supported."
-        )
-    
-    # Parse options or use defaults
-    if options:
-        import json
-        try:
-            options_dict = json.loads(options)
-            processing_options = ProcessingOptions(**options_dict)
-        except Exception as e:
-            logger.error(f"Error parsing options: {str(e)}")
-            processing_options = ProcessingOptions()
-    else:
-        processing_options = ProcessingOptions()
-    
-    try:
-        # Save uploaded file
-        file_path = await save_upload_file(file)
-        
-        # Create job
-        job_data = create_job(file.filename, "pdf")
-        job_id = job_data["job_id"]
-        
-        # Determine output directory if needed
-        output_dir = None
-        if processing_options.output_format == OutputFormat.FILES:
-            output_dir = os.path.join("parsed_docs", job_id)
-        
-        # Start background processing
-        background_tasks.add_task(
-            process_file_background,
-            job_id,
-            file_path,
-            "pdf",
-            processing_options.output_format,
-            output_dir
-        )
-        
-        # Return job data
-        return JobResponse(**job_data)
-    
-    except HTTPException as e:
-        # Re-raise HTTP exceptions
-        raise
-    except Exception as e:
-        logger.error(f"Error processing PDF: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
+    return await _process(background_tasks, file, processing_options, "pdf")
 
 
 @router.post(
@@ -313,59 +327,9 @@ async def process_pdf_file(
 async def process_pptx_file(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    options: Optional[str] = Form(None),
+    processing_options: ProcessingOptions = Depends(parsed_options),
 ) -> JobResponse:
     """
     Process a PowerPoint file.
     """
-    # Check file type
-    if not file.filename.lower().endswith((".pptx", ".ppt")):
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid file type. Only PPTX and PPT files are supported."
-        )
-    
-    # Parse options or use defaults
-    if options:
-        import json
-        try:
-            options_dict = json.loads(options)
-            processing_options = ProcessingOptions(**options_dict)
-        except Exception as e:
-            logger.error(f"Error parsing options: {str(e)}")
-            processing_options = ProcessingOptions()
-    else:
-        processing_options = ProcessingOptions()
-    
-    try:
-        # Save uploaded file
-        file_path = await save_upload_file(file)
-        
-        # Create job
-        job_data = create_job(file.filename, "pptx")
-        job_id = job_data["job_id"]
-        
-        # Determine output directory if needed
-        output_dir = None
-        if processing_options.output_format == OutputFormat.FILES:
-            output_dir = os.path.join("parsed_docs", job_id)
-        
-        # Start background processing
-        background_tasks.add_task(
-            process_file_background,
-            job_id,
-            file_path,
-            "pptx",
-            processing_options.output_format,
-            output_dir
-        )
-        
-        # Return job data
-        return JobResponse(**job_data)
-    
-    except HTTPException as e:
-        # Re-raise HTTP exceptions
-        raise
-    except Exception as e:
-        logger.error(f"Error processing PowerPoint: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing PowerPoint: {str(e)}")
\ No newline at end of file
+    return await _process(background_tasks, file, processing_options, "pptx")
@@ -3,94 +3,608 @@
 Functional API with actual OCR processing.
 """
 
+import asyncio
+import hashlib
 import logging
 import os
+import re
+import secrets
 import shutil
+import subprocess
 import tempfile
-import uuid
+import time
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import cache, partial
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
-from fastapi import BackgroundTasks, FastAPI, File, Form, HTTPException, UploadFile
+import aiofiles
+import orjson
+from cachetools import TTLCache
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 import uvicorn
 
-# Import the actual OCR processing functions
-from src.utils.parse_image import extract_image_text
-from src.utils.parse_pdf import extract_pdf_text_tables_images
-from src.utils.parse_pptx import extract_pptx_text_tables_images
+from src.utils.file_type import get_file_type
+from src.utils.log_queue import setup_queue_logging
+from src.utils.tesseract import limit_ocr_threads
+from src.utils.thumbnails import make_thumbnail
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Configure logging; records are formatted and written on a background thread
+setup_queue_logging()
 logger = logging.getLogger(__name__)
 
+# Number of jobs processed concurrently, and how many may wait in the queue
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+
+# Retries for OCR calls that fail transiently; waits double from OCR_RETRY_BASE_DELAY
+OCR_RETRY_ATTEMPTS = int(os.getenv("OCR_RETRY_ATTEMPTS", "3"))
+OCR_RETRY_BASE_DELAY = float(os.getenv("OCR_RETRY_BASE_DELAY", "0.5"))
+
+# Errors worth retrying: tool subprocesses exiting non-zero or timing out, and
+# memory pressure. Anything else, including pytesseract's TesseractError and
+# pypdfium2's PdfiumError for unsupported or corrupt input, fails the job immediately.
+TRANSIENT_OCR_ERRORS = (
+    subprocess.CalledProcessError,
+    subprocess.TimeoutExpired,
+    TimeoutError,
+    MemoryError,
+)
+
+
+# The OCR parsers pull in tesseract, unstructured, pypdfium2 and python-pptx, so
+# they are imported on first use (or by the startup preload), not at import time
+@cache
+def image_parser():
+    """Import the image parser module."""
+    import src.utils.parse_image as parse_image
+    return parse_image
+
+
+@cache
+def pdf_parser():
+    """Import the PDF parser module."""
+    import src.utils.parse_pdf as parse_pdf
+    return parse_pdf
+
+
+@cache
+def pptx_parser():
+    """Import the PPTX parser module."""
+    import src.utils.parse_pptx as parse_pptx
+    return parse_pptx
+
+
+def preload_parsers():
+    """Import all parser modules ahead of the first job."""
+    image_parser()
+    pdf_parser()
+    pptx_parser()
+
+
+def init_ocr_worker():
+    """Load the OCR stack once per pool worker so jobs don't pay for it."""
+    import pytesseract
+    
+    # Workers OCR side by side, so each tesseract gets a single OpenMP thread
+    limit_ocr_threads()
+    preload_parsers()
+    
+    # Fail fast in the worker if the tesseract binary is missing
+    pytesseract.get_tesseract_version()
+    
+    # Load the in-process engine's language model before the first job
+    image_parser().get_tess_api()
+
+
+def ocr_worker_ready():
+    """No-op task used to start pool workers ahead of the first job."""
+    return os.getpid()
+
+
+# Process pool for the CPU-bound extract_* calls, so OCR bypasses the GIL
+ocr_pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, initializer=init_ocr_worker)
+
+# Bounded queue of (job_id, source, file_type) waiting for a worker;
+# source is an upload path, or the raw bytes of a small image
+job_queue: Optional[asyncio.Queue] = None
+
+# Image OCR microbatching: flush after this many images or this long, whichever first
+OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", "8"))
+OCR_BATCH_WAIT_MS = int(os.getenv("OCR_BATCH_WAIT_MS", "20"))
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once a client has cancelled it."""
+
+
+def check_cancelled(job: dict) -> None:
+    """Stop a job between stages if it has been cancelled."""
+    if job.get("cancelled"):
+        raise JobCancelled()
+
+
+async def run_in_pool(func, *args):
+    """
+    Run a function in the OCR process pool, retrying transient failures.
+    
+    Args:
+        func: Picklable function to run in a pool worker
+        *args: Arguments passed to func
+        
+    Returns:
+        The function's return value
+    """
+    loop = asyncio.get_running_loop()
+    for attempt in range(OCR_RETRY_ATTEMPTS):
+        try:
+            return await loop.run_in_executor(ocr_pool, func, *args)
+        except TRANSIENT_OCR_ERRORS as e:
+            if attempt == OCR_RETRY_ATTEMPTS - 1:
+                raise
+            delay = OCR_RETRY_BASE_DELAY * 2 ** attempt
+            logger.warning(f"{func.__name__} failed ({e!r}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+class BatchOCR:
+    """Coalesce single-image OCR requests into batches sent to the pool together."""
+    
+    def __init__(self, max_batch_size: int = OCR_BATCH_SIZE, max_wait_ms: int = OCR_BATCH_WAIT_MS):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        # In-flight batch tasks; the event loop only keeps weak references to tasks
+        self.tasks = set()
+    
+    async def submit(self, image: Union[str, bytes]) -> str:
+        """Queue an image path or raw image bytes for OCR and wait for its text."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((image, future))
+        return await future
+    
+    async def run(self):
+        """Collect batches until cancelled, dispatching each without waiting for it."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.create_task(self._run_batch(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+    
+    async def _run_batch(self, batch):
+        try:
+            texts = await run_in_pool(image_parser().extract_image_texts, [image for image, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), text in zip(batch, texts):
+            if not future.done():
+                future.set_result(text)
+
+
+batch_ocr = BatchOCR()
+
+
+async def job_worker():
+    """Consume jobs from the queue one at a time."""
+    while True:
+        job_id, source, file_type = await job_queue.get()
+        try:
+            await process_file_background(job_id, source, file_type)
+        finally:
+            job_queue.task_done()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the job workers on startup and stop them on shutdown."""
+    global job_queue
+    job_queue = asyncio.Queue(maxsize=JOB_QUEUE_SIZE)
+    
+    # Import the parsers and spawn the OCR pool workers in the background, so
+    # the server answers health checks immediately; early jobs wait in the queue
+    loop = asyncio.get_running_loop()
+    workers = []
+    
+    async def start_workers():
+        # Finish importing before forking the pool: a fork while another thread
+        # is mid-import can leave the children holding import locks
+        try:
+            await loop.run_in_executor(None, preload_parsers)
+            await asyncio.gather(*(loop.run_in_executor(ocr_pool, ocr_worker_ready) for _ in range(OCR_WORKERS)))
+        except Exception as e:
+            # Start the job workers anyway, so jobs fail with the error instead of waiting
+            logger.error(f"Failed to start the OCR pool: {str(e)}", exc_info=True)
+        # Only job workers submit to the pool, so none start before it is up
+        workers.extend(asyncio.create_task(job_worker()) for _ in range(OCR_WORKERS))
+        workers.append(asyncio.create_task(batch_ocr.run()))
+    
+    startup = asyncio.create_task(start_workers())
+    yield
+    startup.cancel()
+    for worker in workers:
+        worker.cancel()
+    ocr_pool.shutdown(wait=False, cancel_futures=True)
+
+
 # Create FastAPI application
 app = FastAPI(
     title="Owl OCR API (Functional)",
     description="API for OCR and text extraction from various document formats",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Simple in-memory job storage
-jobs = {}
-job_results = {}
+# Entries expire after JOB_TTL seconds; completed results live on disk, not in RAM
+JOB_TTL = int(os.getenv("JOB_TTL", str(60 * 60 * 24)))
+MAX_JOBS = int(os.getenv("MAX_JOBS", "10000"))
+jobs = TTLCache(maxsize=MAX_JOBS, ttl=JOB_TTL)
+job_streams = TTLCache(maxsize=MAX_JOBS, ttl=JOB_TTL)
+
+# How often job event streams check for status changes (seconds)
+JOB_EVENTS_POLL_INTERVAL = 0.5
+
+# Number of partial results kept per job for late stream subscribers
+STREAM_BUFFER_SIZE = int(os.getenv("STREAM_BUFFER_SIZE", "1000"))
+
+
+class JobStream:
+    """Bounded log of partial results for a job that clients can follow."""
+    
+    def __init__(self, maxlen: int = STREAM_BUFFER_SIZE):
+        self.events = deque(maxlen=maxlen)
+        self.total = 0
+        self.done = False
+        self._changed = asyncio.Event()
+    
+    def publish(self, event: dict) -> None:
+        """Append an event and wake up subscribers."""
+        self.events.append(event)
+        self.total += 1
+        self._wake()
+    
+    def close(self, status: str) -> None:
+        """Publish the final job status and end all subscriptions."""
+        self.publish({"type": "status", "status": status})
+        self.done = True
+        self._wake()
+    
+    def _wake(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+    
+    async def subscribe(self):
+        """Yield buffered events, then new ones as they arrive, until the job ends."""
+        next_idx = 0
+        while True:
+            changed = self._changed
+            first_idx = self.total - len(self.events)
+            next_idx = max(next_idx, first_idx)
+            batch = list(self.events)[next_idx - first_idx:]
+            next_idx = self.total
+            for event in batch:
+                yield event
+            if self.done and next_idx == self.total:
+                return
+            if next_idx == self.total:
+                await changed.wait()
+
+
+def publish(job_id: str, event: dict) -> None:
+    """Publish a partial result to the job's stream, if it has one."""
+    stream = job_streams.get(job_id)
+    if stream is not None:
+        stream.publish(event)
 
 # Directory for uploads
 UPLOAD_DIR = os.path.join(os.getcwd(), "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-# Utility function to determine file type
-def get_file_type(file_path):
-    """Determine file type based on file extension."""
-    path = Path(file_path)
-    ext = path.suffix.lower()
-    
-    file_type_map = {
-        '.pptx': 'pptx',
-        '.ppt': 'pptx',
-        '.png': 'image',
-        '.jpeg': 'image',
-        '.jpg': 'image',
-        '.pdf': 'pdf',
-    }
-    
-    return file_type_map.get(ext)
+# Job outputs live in parsed_docs/<shard>/<job_id>; the 256 shard directories
+# are created once here so each job needs a single mkdir
+PARSED_DOCS_DIR = "parsed_docs"
+for shard in range(256):
+    os.makedirs(os.path.join(PARSED_DOCS_DIR, f"{shard:02x}"), exist_ok=True)
+
+# Chunk size used when streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Images up to this size are kept in memory and OCR'd without a disk round-trip
+IN_MEMORY_MAX_BYTES = int(os.getenv("IN_MEMORY_MAX_BYTES", str(20 * 1024 * 1024)))
+
+# Names of slide images written by the PPTX parser, e.g. slide3_img2.png
+SLIDE_IMAGE_RE = re.compile(r"^slide(\d+)_img")
+
+# Results cache keyed by a hash of the uploaded file's content
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", os.path.join(os.getcwd(), "ocr_cache"))
+OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", str(1024 ** 3)))
+os.makedirs(OCR_CACHE_DIR, exist_ok=True)
 
 async def save_upload_file(upload_file: UploadFile) -> str:
     """Save an uploaded file to disk."""
     # Create unique filename to avoid collisions
-    file_id = uuid.uuid4().hex
+    file_id = secrets.token_urlsafe(12)
     filename = f"{file_id}_{upload_file.filename}"
     file_path = os.path.join(UPLOAD_DIR, filename)
     
-    # Save file to disk
+    # Save file to disk in bounded chunks without blocking the event loop
     try:
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, "wb") as f:
-            shutil.copyfileobj(upload_file.file, f)
+        async with aiofiles.open(file_path, "wb") as f:
+            while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+                await f.write(chunk)
         return file_path
     except Exception as e:
         logger.error(f"Error saving file {filename}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
     finally:
-        upload_file.file.close()
+        await upload_file.close()
+
+async def read_upload_file(upload_file: UploadFile) -> bytes:
+    """Read a small uploaded file into memory."""
+    try:
+        return await upload_file.read()
+    except Exception as e:
+        logger.error(f"Error reading file {upload_file.filename}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error reading file: {str(e)}")
+    finally:
+        await upload_file.close()
+
+async def run_in_pool_with_progress(job_id: str, calls, on_result=None):
+    """
+    Run independent OCR calls across the process pool, preserving order.
+    
+    Each call is retried on transient failures by run_in_pool. If the job is
+    cancelled, calls that have not started yet are dropped from the pool.
+    
+    Job progress advances from 40 to 90 as calls complete.
+    
+    Args:
+        job_id: Job whose progress is updated
+        calls: List of (function, *args) tuples
+        on_result: Optional callback(index, result) invoked as each call completes
+        
+    Returns:
+        List of results in the same order as calls
+        
+    Raises:
+        JobCancelled: If the job was cancelled while its calls were running
+    """
+    if not calls:
+        return []
+    
+    job = jobs[job_id]
+    completed = 0
+    
+    futures = []
+    
+    def on_done(future, index):
+        nonlocal completed
+        if future.cancelled():
+            return
+        completed += 1
+        job["progress"] = 40 + 50 * completed // len(calls)
+        if job.get("cancelled"):
+            for other in futures:
+                other.cancel()
+            return
+        if on_result is not None and future.exception() is None:
+            on_result(index, future.result())
+    
+    for index, (func, *args) in enumerate(calls):
+        future = asyncio.ensure_future(run_in_pool(func, *args))
+        future.add_done_callback(partial(on_done, index=index))
+        futures.append(future)
+    
+    try:
+        return await asyncio.gather(*futures)
+    except asyncio.CancelledError:
+        # Only convert our own cancellation; shutdown must still propagate
+        if job.get("cancelled") and not asyncio.current_task().cancelling():
+            raise JobCancelled()
+        raise
+
+def get_job_dir(job_id: str) -> str:
+    """Output directory of a job, sharded by the random tail of its ID."""
+    return os.path.join(PARSED_DOCS_DIR, job_id[-2:], job_id)
+
+def get_result_path(job_id: str) -> str:
+    """Path of the JSON result file for a job."""
+    return os.path.join(get_job_dir(job_id), "result.json")
+
+async def write_result(job_id: str, result: dict) -> None:
+    """Persist a completed job result to disk instead of keeping it in memory."""
+    result_path = get_result_path(job_id)
+    async with aiofiles.open(result_path, "wb") as f:
+        await f.write(orjson.dumps(result))
+
+async def write_text_file(path: str, content: str) -> None:
+    """Write a text file without blocking the event loop."""
+    async with aiofiles.open(path, "w", encoding="utf-8") as f:
+        await f.write(content)
+
+async def write_binary_file(path: str, content: bytes) -> None:
+    """Write a binary file without blocking the event loop."""
+    async with aiofiles.open(path, "wb") as f:
+        await f.write(content)
+
+def hash_file(source: Union[str, bytes]) -> str:
+    """Compute a content hash of a file path or in-memory bytes, reading files in chunks."""
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(source, bytes):
+        digest.update(source)
+        return digest.hexdigest()
+    with open(source, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_cached_result(digest: str) -> Optional[dict]:
+    """Load a cached result by content hash, marking it as recently used."""
+    cache_path = os.path.join(OCR_CACHE_DIR, f"{digest}.json")
+    try:
+        with open(cache_path, "rb") as f:
+            result = orjson.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable cache entry {cache_path}: {str(e)}")
+        return None
+    os.utime(cache_path)
+    return result
+
+def link_or_copy(src: str, dst: str) -> None:
+    """Hard-link a file, copying it instead when linking is not possible."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def adopt_cached_result(cached: dict, job_id: str, file_name: str) -> Optional[dict]:
+    """
+    Link a cached result's artifacts into a new job's output directory.
+    
+    Paths in the result are rewritten to the new job directory, with the earlier
+    upload's base name replaced by the current one. Returns None if the artifacts
+    no longer exist, in which case the file is processed again.
+    """
+    old_dir = get_job_dir(cached["job_id"])
+    new_dir = get_job_dir(job_id)
+    old_stem = Path(cached["file_name"]).stem
+    new_stem = Path(file_name).stem
+    
+    def relocate(path: str) -> str:
+        rel = os.path.relpath(path, old_dir)
+        if rel.startswith(old_stem):
+            rel = new_stem + rel[len(old_stem):]
+        return os.path.join(new_dir, rel)
+    
+    try:
+        output_files = {}
+        for key, path in cached["output_files"].items():
+            output_files[key] = relocate(path)
+            if os.path.isdir(path):
+                shutil.copytree(path, output_files[key], copy_function=link_or_copy)
+            else:
+                link_or_copy(path, output_files[key])
+    except FileNotFoundError:
+        # Start the job over with an empty output directory
+        shutil.rmtree(new_dir)
+        os.mkdir(new_dir)
+        return None
+    
+    images_dir = cached["output_files"].get("images_dir")
+    images = []
+    for image in cached["images"]:
+        path = image["path"]
+        if images_dir is not None and path.startswith(images_dir + os.sep):
+            # Already linked with its directory; keep the file name
+            path = os.path.join(output_files["images_dir"], os.path.basename(path))
+        else:
+            path = relocate(path)
+        images.append({**image, "path": path})
+    
+    return {
+        **cached,
+        "job_id": job_id,
+        "file_name": file_name,
+        "images": images,
+        "output_files": output_files,
+    }
+
+def store_cached_result(digest: str, result: dict) -> None:
+    """Atomically write a result to the cache, then evict old entries if over budget."""
+    try:
+        cache_path = os.path.join(OCR_CACHE_DIR, f"{digest}.json")
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(result))
+        os.replace(tmp_path, cache_path)
+        evict_cache()
+    except Exception as e:
+        logger.warning(f"Failed to cache result for {digest}: {str(e)}")
+
+def evict_cache() -> None:
+    """Delete least recently used cache entries until the cache fits OCR_CACHE_MAX_BYTES."""
+    entries = []
+    for entry in os.scandir(OCR_CACHE_DIR):
+        if entry.name.endswith(".json"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= OCR_CACHE_MAX_BYTES:
+            break
+        os.remove(path)
+        total -= size
+
+def publish_elements(job_id: str, texts, tables_html, source: str) -> None:
+    """Publish embedded text runs and tables extracted before OCR."""
+    for text in texts:
+        publish(job_id, {"type": "text", "text": text, "source": source, "page_number": None})
+    for html in tables_html:
+        publish(job_id, {"type": "table", "html": html, "source": source, "page_number": None})
 
 async def process_file_background(
     job_id: str, 
-    file_path: str, 
+    source: Union[str, bytes], 
     file_type: str
 ):
-    """Process a file in the background."""
+    """
+    Process a file, running the OCR extraction in the process pool.
+    
+    Small images arrive as raw bytes and never touch the upload directory.
+    """
+    loop = asyncio.get_running_loop()
+    # Hold a reference so updates stay safe if the entry expires from the cache
+    job = jobs[job_id]
+    file_path = source if isinstance(source, str) else job["file_name"]
     try:
+        # Skip jobs cancelled while they were waiting in the queue
+        check_cancelled(job)
+        
         # Update job status
-        jobs[job_id]["status"] = "processing"
-        jobs[job_id]["progress"] = 20
+        job["status"] = "processing"
+        job["progress"] = 20
         
         # Create output directory
-        output_dir = os.path.join("parsed_docs", job_id)
-        os.makedirs(output_dir, exist_ok=True)
+        output_dir = get_job_dir(job_id)
+        os.mkdir(output_dir)
+        
+        # Reuse the result of an earlier upload with identical content
+        digest = await loop.run_in_executor(None, hash_file, source)
+        cached = await loop.run_in_executor(None, load_cached_result, digest)
+        if cached is not None:
+            cached = await loop.run_in_executor(
+                None, adopt_cached_result, cached, job_id, os.path.basename(file_path)
+            )
+        if cached is not None:
+            await write_result(job_id, cached)
+            job["output_files"] = cached["output_files"]
+            job["status"] = "completed"
+            job["progress"] = 100
+            job["message"] = "Result served from cache"
+            if job_id in job_streams:
+                publish_elements(job_id, [t["text"] for t in cached["texts"]],
+                                 [t["html"] for t in cached["tables"]], file_type)
+                job_streams[job_id].close("completed")
+            return
         
         result = {
             "job_id": job_id,
@@ -105,17 +619,17 @@ async def process_file_background(
         # Process based on file type
         if file_type == "image":
             # Update status
-            jobs[job_id]["progress"] = 40
+            job["progress"] = 40
             
             # Extract text from image
-            extracted_text = extract_image_text(file_path)
+            extracted_text = await batch_ocr.submit(source)
+            publish(job_id, {"type": "text", "text": extracted_text, "source": "image", "page_number": None})
             
             # Save text to file
             base_name = Path(file_path).stem
             out_text = os.path.join(output_dir, f"{base_name}.txt")
             
-            with open(out_text, "w", encoding="utf-8") as f:
-                f.write(extracted_text)
+            await write_text_file(out_text, extracted_text)
             
             # Add result
             result["texts"].append({
@@ -127,27 +641,50 @@ async def process_file_background(
             
         elif file_type == "pdf":
             # Update status
-            jobs[job_id]["progress"] = 40
+            job["progress"] = 40
             
             # Create images directory
             base_name = Path(file_path).stem
             images_dir = os.path.join(output_dir, base_name)
-            os.makedirs(images_dir, exist_ok=True)
+            os.mkdir(images_dir)
+            
+            # Extract embedded text and tables, then render every page in parallel,
+            # OCR'ing only the scanned ones
+            texts, tables_html, text_pages = await run_in_pool(pdf_parser().extract_pdf_elements, file_path)
+            publish_elements(job_id, texts, tables_html, "pdf")
+            check_cancelled(job)
+            try:
+                page_count = await loop.run_in_executor(None, pdf_parser().get_pdf_page_count, file_path)
+            except Exception as e:
+                logger.warning(f"Failed to read page count for {file_path}: {str(e)}")
+                page_count = 0
             
-            # Extract PDF content
-            texts, tables_html = extract_pdf_text_tables_images(file_path, images_dir=images_dir)
+            # Page images come back as PNG bytes and are written concurrently
+            # while the remaining pages are still being OCR'd
+            image_writes = []
+            def on_page(index, page):
+                text, png = page
+                if text:
+                    publish(job_id, {"type": "text", "text": text, "source": "page", "page_number": index + 1})
+                if png is not None:
+                    image_path = os.path.join(images_dir, f"page_{index + 1}.png")
+                    image_writes.append(asyncio.ensure_future(write_binary_file(image_path, png)))
+            
+            pages = await run_in_pool_with_progress(
+                job_id,
+                [(pdf_parser().render_and_ocr_pdf_page, file_path, page_idx, page_idx not in text_pages)
+                 for page_idx in range(1, page_count + 1)],
+                on_result=on_page,
+            )
+            await asyncio.gather(*image_writes)
+            texts.extend(text for text, _ in pages if text)
             
             # Save text and tables
             out_text = os.path.join(output_dir, f"{base_name}.txt")
             out_tables = os.path.join(output_dir, f"{base_name}_tables.html")
             
-            with open(out_text, "w", encoding="utf-8") as f:
-                for t in texts:
-                    f.write(t.strip() + "\n\n")
-                    
-            with open(out_tables, "w", encoding="utf-8") as f:
-                for html in tables_html:
-                    f.write(html + "\n\n")
+            await write_text_file(out_text, "".join(f"{t.strip()}\n\n" for t in texts))
+            await write_text_file(out_tables, "".join(f"{html}\n\n" for html in tables_html))
             
             # Add results
             for text in texts:
@@ -165,22 +702,13 @@ async def process_file_background(
                 })
             
             # Add image files
-            if os.path.exists(images_dir):
-                for img_file in os.listdir(images_dir):
-                    if img_file.startswith("page_") and img_file.endswith(".png"):
-                        try:
-                            page_num = int(img_file.replace("page_", "").replace(".png", ""))
-                            result["images"].append({
-                                "path": os.path.join(images_dir, img_file),
-                                "source": "page",
-                                "page_number": page_num
-                            })
-                        except ValueError:
-                            result["images"].append({
-                                "path": os.path.join(images_dir, img_file),
-                                "source": "page",
-                                "page_number": None
-                            })
+            for page_idx, (_, png) in enumerate(pages, start=1):
+                if png is not None:
+                    result["images"].append({
+                        "path": os.path.join(images_dir, f"page_{page_idx}.png"),
+                        "source": "page",
+                        "page_number": page_idx
+                    })
             
             result["output_files"] = {
                 "text": out_text,
@@ -190,27 +718,39 @@ async def process_file_background(
             
         elif file_type == "pptx":
             # Update status
-            jobs[job_id]["progress"] = 40
+            job["progress"] = 40
             
             # Create images directory
             base_name = Path(file_path).stem
             images_dir = os.path.join(output_dir, base_name)
-            os.makedirs(images_dir, exist_ok=True)
+            os.mkdir(images_dir)
+            
+            # Extract text and tables, then OCR slide images in parallel
+            texts, tables_html = await run_in_pool(pptx_parser().extract_pptx_elements, file_path)
+            publish_elements(job_id, texts, tables_html, "slide")
+            check_cancelled(job)
+            image_paths = await run_in_pool(pptx_parser().extract_pptx_images, file_path, images_dir)
+            def publish_image(index, runs):
+                for text in runs:
+                    publish(job_id, {"type": "text", "text": text, "source": "image", "page_number": None})
             
-            # Extract PPTX content
-            texts, tables_html = extract_pptx_text_tables_images(file_path, images_dir=images_dir)
+            # Images reused across slides share a path, so each is OCR'd once
+            unique_paths = list(dict.fromkeys(image_paths))
+            image_texts = await run_in_pool_with_progress(
+                job_id,
+                [(pptx_parser().ocr_image_file, image_path) for image_path in unique_paths],
+                on_result=publish_image,
+            )
+            texts_for_path = dict(zip(unique_paths, image_texts))
+            for image_path in image_paths:
+                texts.extend(texts_for_path[image_path])
             
             # Save text and tables
             out_text = os.path.join(output_dir, f"{base_name}.txt")
             out_tables = os.path.join(output_dir, f"{base_name}_tables.html")
             
-            with open(out_text, "w", encoding="utf-8") as f:
-                for t in texts:
-                    f.write(t.strip() + "\n\n")
-                    
-            with open(out_tables, "w", encoding="utf-8") as f:
-                for html in tables_html:
-                    f.write(html + "\n\n")
+            await write_text_file(out_text, "".join(f"{t.strip()}\n\n" for t in texts))
+            await write_text_file(out_tables, "".join(f"{html}\n\n" for html in tables_html))
             
             # Add results
             for text in texts:
@@ -229,22 +769,14 @@ async def process_file_background(
             
             # Add image files
             if os.path.exists(images_dir):
-                for img_file in os.listdir(images_dir):
-                    if img_file.startswith("slide") and "_img" in img_file:
-                        try:
-                            slide_part = img_file.split("_")[0]
-                            slide_num = int(slide_part.replace("slide", ""))
-                            result["images"].append({
-                                "path": os.path.join(images_dir, img_file),
-                                "source": "slide",
-                                "page_number": slide_num
-                            })
-                        except ValueError:
-                            result["images"].append({
-                                "path": os.path.join(images_dir, img_file),
-                                "source": "slide",
-                                "page_number": None
-                            })
+                for entry in os.scandir(images_dir):
+                    match = SLIDE_IMAGE_RE.match(entry.name)
+                    if match:
+                        result["images"].append({
+                            "path": entry.path,
+                            "source": "slide",
+                            "page_number": int(match.group(1))
+                        })
             
             result["output_files"] = {
                 "text": out_text,
@@ -252,16 +784,29 @@ async def process_file_background(
                 "images_dir": images_dir
             }
         
-        # Update job status to completed and store result
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["progress"] = 100
-        job_results[job_id] = result
+        # Store result, then update job status to completed
+        check_cancelled(job)
+        await write_result(job_id, result)
+        job["output_files"] = result["output_files"]
+        job["status"] = "completed"
+        job["progress"] = 100
+        if job_id in job_streams:
+            job_streams[job_id].close("completed")
+        await loop.run_in_executor(None, store_cached_result, digest, result)
         
+    except JobCancelled:
+        logger.info(f"Job {job_id} cancelled")
+        job["status"] = "cancelled"
+        job["message"] = "Cancelled by client"
+        if job_id in job_streams:
+            job_streams[job_id].close("cancelled")
     except Exception as e:
         logger.error(f"Error processing job {job_id}: {str(e)}", exc_info=True)
         # Update job status to failed
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["message"] = f"Processing failed: {str(e)}"
+        job["status"] = "failed"
+        job["message"] = f"Processing failed: {str(e)}"
+        if job_id in job_streams:
+            job_streams[job_id].close("failed")
 
 # API routes
 @app.get("/", tags=["Health"])
@@ -274,43 +819,42 @@ async def health_check():
 
 @app.post("/api/process", tags=["Process"])
 async def process_file_auto(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
 ):
     """Process a file with automatic format detection."""
     try:
-        # Save uploaded file
-        file_path = await save_upload_file(file)
-        
-        # Detect file type
-        file_type = get_file_type(file_path)
+        # Detect file type before anything is written to disk
+        file_type = get_file_type(file.filename or "")
         if not file_type:
-            os.remove(file_path)  # Clean up
             raise HTTPException(
                 status_code=400,
-                detail=f"Unsupported file type: {Path(file.filename).suffix}"
+                detail=f"Unsupported file type: {Path(file.filename or '').suffix}"
             )
         
+        # Keep small images in memory; everything else is saved for the parsers
+        if file_type == "image" and file.size is not None and file.size <= IN_MEMORY_MAX_BYTES:
+            source = await read_upload_file(file)
+        else:
+            source = await save_upload_file(file)
+        
         # Create job
-        job_id = uuid.uuid4().hex
+        now = time.time_ns()
+        job_id = f"{now:016x}{secrets.token_hex(8)}"
+        timestamp = str(now)
         job_data = {
             "job_id": job_id,
             "file_name": file.filename,
             "file_type": file_type,
             "status": "pending",
-            "created_at": str(uuid.uuid1().time),
-            "updated_at": str(uuid.uuid1().time),
+            "created_at": timestamp,
+            "updated_at": timestamp,
             "progress": 0,
         }
         jobs[job_id] = job_data
+        job_streams[job_id] = JobStream()
         
-        # Start background processing
-        background_tasks.add_task(
-            process_file_background,
-            job_id,
-            file_path,
-            file_type
-        )
+        # Queue for background processing; waits when the queue is full
+        await job_queue.put((job_id, source, file_type))
         
         # Return job data
         return job_data
@@ -344,14 +888,119 @@ async def get_job_result(job_id: str):
                 detail=f"Job {job_id} failed: {job.get('message', 'Unknown error')}"
             )
         raise HTTPException(
-            status_code=102,
+            status_code=409,
             detail=f"Job {job_id} is still {job['status']}. Current progress: {job.get('progress', 0)}%"
         )
     
-    if job_id not in job_results:
+    result_path = get_result_path(job_id)
+    if not os.path.exists(result_path):
         raise HTTPException(status_code=404, detail=f"Result for job {job_id} not found")
     
-    return job_results[job_id]
+    return FileResponse(result_path, media_type="application/json")
+
+@app.get("/api/jobs/{job_id}/download/{artifact}", tags=["Jobs"])
+async def download_job_artifact(job_id: str, artifact: str):
+    """Download one of a completed job's output files, e.g. "text" or "tables"."""
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    job = jobs[job_id]
+    if job["status"] != "completed":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job {job_id} is {job['status']}, artifacts are not available yet"
+        )
+    
+    # Only paths recorded by the job itself can be served, never client input
+    path = job.get("output_files", {}).get(artifact)
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"Artifact {artifact} not found for job {job_id}")
+    
+    # FileResponse streams the file with sendfile, without copying it through Python
+    return FileResponse(path, filename=os.path.basename(path))
+
+@app.get("/api/jobs/{job_id}/thumb/{index}", tags=["Jobs"])
+async def get_image_thumbnail(job_id: str, index: int):
+    """Get a WebP thumbnail of one of a job's extracted images, generating it on first request."""
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    thumb_path = os.path.join(get_job_dir(job_id), "thumbs", f"{index}.webp")
+    if not os.path.isfile(thumb_path):
+        result_path = get_result_path(job_id)
+        if not os.path.exists(result_path):
+            raise HTTPException(status_code=404, detail=f"Result for job {job_id} not found")
+        async with aiofiles.open(result_path, "rb") as f:
+            images = orjson.loads(await f.read())["images"]
+        if not 0 <= index < len(images):
+            raise HTTPException(status_code=404, detail=f"Image {index} not found for job {job_id}")
+        
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, make_thumbnail, images[index]["path"], thumb_path)
+        except OSError as e:
+            logger.error(f"Error creating thumbnail for job {job_id} image {index}: {str(e)}")
+            raise HTTPException(status_code=404, detail=f"Image {index} is not available for job {job_id}")
+    
+    # A thumbnail never changes once generated, so browsers may cache it for a day
+    return FileResponse(
+        thumb_path,
+        media_type="image/webp",
+        headers={"Cache-Control": "public, max-age=86400, immutable"},
+    )
+
+@app.get("/api/jobs/{job_id}/events", tags=["Jobs"])
+async def stream_job_events(job_id: str):
+    """Stream job status changes as server-sent events until the job finishes."""
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    job = jobs[job_id]
+    
+    async def events():
+        last_payload = None
+        while True:
+            payload = orjson.dumps(job)
+            if payload != last_payload:
+                yield b"data: " + payload + b"\n\n"
+                last_payload = payload
+            if job["status"] in ("completed", "failed", "cancelled"):
+                return
+            await asyncio.sleep(JOB_EVENTS_POLL_INTERVAL)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+@app.delete("/api/jobs/{job_id}", tags=["Jobs"])
+async def cancel_job(job_id: str):
+    """Cancel a pending or running job; OCR work not yet started is skipped."""
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    job = jobs[job_id]
+    if job["status"] in ("completed", "failed", "cancelled"):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job {job_id} is already {job['status']}"
+        )
+    
+    job["cancelled"] = True
+    return {"job_id": job_id, "status": "cancelling"}
+
+@app.get("/api/jobs/{job_id}/stream", tags=["Jobs"])
+async def stream_job_results(job_id: str):
+    """Stream partial results of a job as newline-delimited JSON while it runs."""
+    if job_id not in job_streams:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    async def stream_events():
+        async for event in job_streams[job_id].subscribe():
+            yield orjson.dumps(event) + b"\n"
+    
+    return StreamingResponse(stream_events(), media_type="application/x-ndjson")
 
 if __name__ == "__main__":
     # For local development
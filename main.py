@@ -24,29 +24,12 @@ Use --help or the help command for detailed usage information.
 """
 
 import argparse
+import os
 import sys
 import logging
 from pathlib import Path
 
-# File type detection
-def get_file_type(file_path):
-    """Determine file type based on file extension."""
-    path = Path(file_path)
-    ext = path.suffix.lower()
-    
-    file_type_map = {
-        '.pptx': 'pptx',
-        '.ppt': 'pptx',  # Treat .ppt as .pptx for now
-        '.png': 'image',
-        '.jpeg': 'image',
-        '.jpg': 'image',
-        '.pdf': 'pdf',
-        # Future file types can be added here:
-        # '.docx': 'docx',
-        # '.doc': 'docx',
-    }
-    
-    return file_type_map.get(ext)
+from src.utils.file_type import get_file_type
 
 
 def create_parser():
@@ -214,19 +197,13 @@ def process_auto(args):
         sys.exit(1)
 
     # Route to appropriate parser based on file type
+    if file_type not in FILE_TYPE_COMMANDS:
+        logging.error(f"Error: Parser for file type '{file_type}' not implemented yet.")
+        sys.exit(1)
+    handler, input_attr = COMMANDS[file_type]
+    setattr(args, input_attr, args.input_file)
     try:
-        if file_type == 'pptx':
-            args.pptx_file = args.input_file
-            process_pptx(args)
-        elif file_type == 'image':
-            args.image_file = args.input_file
-            process_image(args)
-        elif file_type == 'pdf':
-            args.pdf_file = args.input_file
-            process_pdf(args)
-        else:
-            logging.error(f"Error: Parser for file type '{file_type}' not implemented yet.")
-            sys.exit(1)
+        handler(args)
     except Exception as e:
         logging.error(f"Error processing {args.input_file}: {str(e)}")
         if args.verbose:
@@ -238,7 +215,24 @@ def process_auto(args):
         sys.exit(1)
 
 
+# Command name -> (handler, name of the args attribute holding the input file)
+COMMANDS = {
+    "pptx": (process_pptx, "pptx_file"),
+    "image": (process_image, "image_file"),
+    "pdf": (process_pdf, "pdf_file"),
+    "auto": (process_auto, "input_file"),
+}
+
+# Commands that handle a single detected file type, used by auto mode
+FILE_TYPE_COMMANDS = frozenset({"pptx", "image", "pdf"})
+
+
 def main():
+    # The CLI processes a single document, so it may use every core for it,
+    # with OCR tasks running side by side on one OpenMP thread each
+    os.environ.setdefault("OCR_WORKERS", "1")
+    from src.utils.tesseract import limit_ocr_threads
+    limit_ocr_threads()
     try:
         # Create parser and parse arguments
         parser = create_parser()
@@ -260,36 +254,14 @@ def main():
             return
             
         # Route to appropriate command handler
-        if args.command == "pptx":
-            if not hasattr(args, 'pptx_file') or not args.pptx_file:
-                logging.error("Error: No input file specified. Use -i/--input to specify a file.")
-                return
-            process_pptx(args)
-        elif args.command == "image":
-            if not hasattr(args, 'image_file') or not args.image_file:
-                logging.error("Error: No input file specified. Use -i/--input to specify a file.")
-                return
-            process_image(args)
-        elif args.command == "pdf":
-            if not hasattr(args, 'pdf_file') or not args.pdf_file:
-                logging.error("Error: No input file specified. Use -i/--input to specify a file.")
-                return
-            process_pdf(args)
-        elif args.command == "auto":
-            if not hasattr(args, 'input_file') or not args.input_file:
-                logging.error("Error: No input file specified. Use -i/--input to specify a file.")
-                return
-            process_auto(args)
+        handler, input_attr = COMMANDS[args.command]
+        input_file = getattr(args, input_attr, None)
+        if not input_file:
+            logging.error("Error: No input file specified. Use -i/--input to specify a file.")
+            return
+        handler(args)
         
-        # Determine which input file was used
-        input_file = None
-        if args.command == "auto" and hasattr(args, 'input_file'):
-            input_file = args.input_file
-        elif hasattr(args, f"{args.command}_file"):
-            input_file = getattr(args, f"{args.command}_file")
-            
-        if input_file:
-            logging.info(f"Processing complete for {input_file}")
+        logging.info(f"Processing complete for {input_file}")
         
     except KeyboardInterrupt:
         logging.error("\nProcess interrupted by user. Exiting...")
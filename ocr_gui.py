@@ -8,19 +8,65 @@ A FastGui-based frontend for the Owl OCR API that allows users to:
 - View extracted text, tables, and images
 """
 
+import asyncio
 import os
-import time
 from typing import Dict, List, Optional, Union
 import base64
 from pathlib import Path
-import tempfile
 
 import fastgui as fg
 import httpx
+import orjson
 
 # API Configuration
 API_URL = "http://localhost:8000"  # Change this if your API is running on a different host/port
 
+# MIME type sent with each upload, by file extension
+EXT_TO_MIME = {
+    "pdf": "application/pdf",
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "ppt": "application/vnd.ms-powerpoint",
+}
+
+# Number of extracted texts shown per page of the text tab
+TEXT_PAGE_SIZE = 20
+
+# Once a job is this far along, its result is fetched alongside the status
+SPECULATIVE_RESULT_PROGRESS = 90
+
+# Cap on concurrent uploads, and retries for uploads that never reached the API
+MAX_UPLOAD_CONCURRENCY = int(os.getenv("OWL_MAX_UPLOAD_CONCURRENCY", "20"))
+UPLOAD_ATTEMPTS = 3
+_upload_sem = asyncio.Semaphore(MAX_UPLOAD_CONCURRENCY)
+
+# Errors raised before the request was sent, so retrying cannot create a duplicate job
+RETRYABLE_UPLOAD_ERRORS = (httpx.PoolTimeout, httpx.ConnectError, httpx.ConnectTimeout)
+
+# Shared HTTP client so API calls reuse pooled keep-alive connections
+_client: Optional[httpx.AsyncClient] = None
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared API client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=API_URL,
+            timeout=60.0,  # Long timeout for large files
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+            http2=True,  # Used when the API is served over HTTPS; gzip is negotiated by default
+        )
+    return _client
+
+async def close_client() -> None:
+    """Close the shared API client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 # FastGui app state
 class AppState(fg.State):
     # Upload state
@@ -48,46 +94,51 @@ class AppState(fg.State):
     error: Optional[str] = None
     current_tab: str = "upload"
     result_tab: str = "text"
+    text_page: int = 0
     
-    # Auto-refresh timer
-    last_refresh: float = 0
+    # Auto-refresh via the job's server-sent event stream
     auto_refresh: bool = True
 
 # Create FastGui app
+app_state = AppState()
 app = fg.App(
     title="Owl OCR Frontend",
-    state=AppState(),
+    state=app_state,
     css="static/style.css",  # Add CSS styling
 )
 
 # API communication helpers
+def get_error_detail(response: httpx.Response) -> str:
+    """Extract the error message from an API error response, which may not be JSON."""
+    if "json" in response.headers.get("content-type", ""):
+        try:
+            return orjson.loads(response.content).get("detail", response.text[:200])
+        except (orjson.JSONDecodeError, AttributeError):
+            pass
+    return response.text[:200] or "Unknown error"
+
 async def api_upload_file(state: AppState) -> Union[Dict, str]:
     """Upload a file to the API for processing."""
     state.loading = True
     state.error = None
     
     try:
-        # Create temporary file from uploaded content
-        with tempfile.NamedTemporaryFile(delete=False) as tmp:
-            tmp.write(state.file_content)
-            tmp_path = tmp.name
+        # Upload the in-memory content directly, without a temporary file
+        files = {"file": (state.file_name, state.file_content, state.file_type)}
         
-        # Upload file to API
-        files = {"file": (state.file_name, open(tmp_path, "rb"), "application/octet-stream")}
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{API_URL}/api/process",
-                files=files,
-                timeout=60.0  # Long timeout for large files
-            )
-        
-        # Clean up temporary file
-        os.unlink(tmp_path)
+        async with _upload_sem:
+            for attempt in range(UPLOAD_ATTEMPTS):
+                try:
+                    response = await get_client().post("/api/process", files=files)
+                    break
+                except RETRYABLE_UPLOAD_ERRORS:
+                    if attempt == UPLOAD_ATTEMPTS - 1:
+                        raise
+                    await asyncio.sleep(2 ** attempt)
         
         # Check response
         if response.status_code == 200:
-            result = response.json()
+            result = orjson.loads(response.content)
             state.job_id = result["job_id"]
             state.job_status = result["status"]
             state.job_progress = result.get("progress", 0)
@@ -97,7 +148,7 @@ async def api_upload_file(state: AppState) -> Union[Dict, str]:
             state.current_tab = "status"
             return result
         else:
-            error_detail = response.json().get("detail", "Unknown error")
+            error_detail = get_error_detail(response)
             state.error = f"API error: {response.status_code} - {error_detail}"
             return f"Error: {error_detail}"
     
@@ -116,23 +167,33 @@ async def api_get_job_status(state: AppState) -> Union[Dict, str]:
     
     state.loading = True
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{API_URL}/api/jobs/{state.job_id}")
+        # Near the end of a job, request the result in parallel with the status
+        client = get_client()
+        requests = [client.get(f"/api/jobs/{state.job_id}")]
+        if state.job_status == "processing" and state.job_progress >= SPECULATIVE_RESULT_PROGRESS:
+            requests.append(client.get(f"/api/jobs/{state.job_id}/result"))
+        responses = await asyncio.gather(*requests, return_exceptions=True)
+        
+        response = responses[0]
+        if isinstance(response, Exception):
+            raise response
         
         if response.status_code == 200:
-            result = response.json()
-            state.job_status = result["status"]
-            state.job_progress = result.get("progress", 0)
-            state.job_message = result.get("message")
-            state.job_updated_at = result["updated_at"]
+            result = orjson.loads(response.content)
+            apply_job_status(state, result)
             
             # If job is completed, allow viewing results
             if state.job_status == "completed":
-                await api_get_job_result(state)
+                result_response = responses[1] if len(responses) > 1 else None
+                if isinstance(result_response, httpx.Response) and result_response.status_code == 200:
+                    apply_job_result(state, orjson.loads(result_response.content))
+                else:
+                    # Not requested, or requested before the result was ready
+                    await api_get_job_result(state)
             
             return result
         else:
-            error_detail = response.json().get("detail", "Unknown error")
+            error_detail = get_error_detail(response)
             state.error = f"API error: {response.status_code} - {error_detail}"
             return f"Error: {error_detail}"
     
@@ -143,6 +204,56 @@ async def api_get_job_status(state: AppState) -> Union[Dict, str]:
     finally:
         state.loading = False
 
+def apply_job_status(state: AppState, result: Dict) -> None:
+    """Copy job status fields from an API response into the app state."""
+    state.job_status = result["status"]
+    state.job_progress = result.get("progress", 0)
+    state.job_message = result.get("message")
+    state.job_updated_at = result["updated_at"]
+
+def apply_job_result(state: AppState, result: Dict) -> None:
+    """Copy job results from an API response into the app state."""
+    state.texts = result.get("texts", [])
+    state.tables = result.get("tables", [])
+    state.images = result.get("images", [])
+    state.text_page = 0
+    state.current_tab = "result"
+
+async def api_watch_job_status(state: AppState) -> Optional[int]:
+    """
+    Follow job status over server-sent events until the job finishes.
+    
+    Returns the stream's HTTP status code, or None if the API could not be reached.
+    """
+    job_id = state.job_id
+    try:
+        async with get_client().stream(
+            "GET", f"/api/jobs/{job_id}/events", timeout=None
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                error_detail = get_error_detail(response)
+                state.error = f"API error: {response.status_code} - {error_detail}"
+                return response.status_code
+            
+            # Each "data:" line carries the full job data after a change
+            async for line in response.aiter_lines():
+                if state.job_id != job_id:
+                    # A new job was submitted; its own stream takes over
+                    return response.status_code
+                if line.startswith("data: "):
+                    apply_job_status(state, orjson.loads(line[len("data: "):]))
+        
+        # If job is completed, allow viewing results
+        if state.job_status == "completed":
+            await api_get_job_result(state)
+        return response.status_code
+    
+    except Exception as e:
+        state.error = f"Error watching job status: {str(e)}"
+        return None
+
+
 async def api_get_job_result(state: AppState) -> Union[Dict, str]:
     """Get job result from the API."""
     if not state.job_id:
@@ -155,18 +266,14 @@ async def api_get_job_result(state: AppState) -> Union[Dict, str]:
     
     state.loading = True
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{API_URL}/api/jobs/{state.job_id}/result")
+        response = await get_client().get(f"/api/jobs/{state.job_id}/result")
         
         if response.status_code == 200:
-            result = response.json()
-            state.texts = result.get("texts", [])
-            state.tables = result.get("tables", [])
-            state.images = result.get("images", [])
-            state.current_tab = "result"
+            result = orjson.loads(response.content)
+            apply_job_result(state, result)
             return result
         else:
-            error_detail = response.json().get("detail", "Unknown error")
+            error_detail = get_error_detail(response)
             state.error = f"API error: {response.status_code} - {error_detail}"
             return f"Error: {error_detail}"
     
@@ -177,6 +284,14 @@ async def api_get_job_result(state: AppState) -> Union[Dict, str]:
     finally:
         state.loading = False
 
+async def warm_up_client() -> None:
+    """Open a pooled connection to the API so the first upload can reuse it."""
+    try:
+        await get_client().get("/api/health")
+    except httpx.HTTPError:
+        # The API may not be up yet; the first real request will connect instead
+        pass
+
 # File upload handlers
 def on_file_selected(state: AppState, evt: fg.UploadEvent):
     """Handle file selection event."""
@@ -185,7 +300,7 @@ def on_file_selected(state: AppState, evt: fg.UploadEvent):
         state.file_content = evt.content
         state.file_name = evt.name
         state.file_size = len(evt.content)
-        state.file_type = Path(evt.name).suffix.lower()[1:]  # Remove the dot
+        state.file_type = EXT_TO_MIME.get(Path(evt.name).suffix.lower()[1:], "application/octet-stream")
         state.error = None
     else:
         state.uploaded_file = None
@@ -195,15 +310,37 @@ def on_file_selected(state: AppState, evt: fg.UploadEvent):
         state.file_type = None
 
 # Auto-refresh handler
-async def check_job_status(state: AppState):
-    """Periodically check job status if auto-refresh is enabled."""
-    if not state.auto_refresh or not state.job_id or state.job_status == "completed" or state.job_status == "failed":
-        return
+JOB_WATCH_INTERVAL = 1.0  # Seconds between checks for a job to follow
+JOB_WATCH_MAX_INTERVAL = 30.0  # Longest wait between retries while the stream keeps failing
+
+async def watch_job_status_loop(state: AppState):
+    """
+    Long-lived task started once with the app: follows the active job's
+    event stream whenever auto-refresh is enabled and the job is running.
     
-    current_time = time.time()
-    if current_time - state.last_refresh >= 2.0:  # Check every 2 seconds
-        state.last_refresh = current_time
-        await api_get_job_status(state)
+    Failed streams are retried with exponential backoff; a job the API rejects
+    with a 4xx (e.g. expired) is not followed again.
+    """
+    interval = JOB_WATCH_INTERVAL
+    watched_job_id = None
+    abandoned_job_id = None
+    while True:
+        job_id = state.job_id
+        if job_id != watched_job_id:
+            # New job: start over with the normal interval
+            watched_job_id = job_id
+            interval = JOB_WATCH_INTERVAL
+        
+        if (state.auto_refresh and job_id and job_id != abandoned_job_id
+                and state.job_status not in ("completed", "failed")):
+            status_code = await api_watch_job_status(state)
+            if status_code == 200:
+                interval = JOB_WATCH_INTERVAL
+            elif status_code is not None and 400 <= status_code < 500:
+                abandoned_job_id = job_id
+            else:
+                interval = min(interval * 2, JOB_WATCH_MAX_INTERVAL)
+        await asyncio.sleep(interval)
 
 # UI Components
 def file_upload_panel(state: AppState) -> fg.Component:
@@ -348,10 +485,31 @@ def results_panel(state: AppState) -> fg.Component:
                             len(state.texts) > 0,
                             fg.Stack([
                                 fg.Heading(4, "Extracted Text"),
-                                *[fg.Stack([
-                                    fg.Heading(5, f"Text from {text['source']} {text['page_number'] if text['page_number'] is not None else ''}"),
-                                    fg.Code(text["text"])
-                                ]) for text in state.texts]
+                                # One component for the current page of texts
+                                fg.Code("\n\n".join(
+                                    f"--- Text from {text['source']} {text['page_number'] if text['page_number'] is not None else ''}\n{text['text']}"
+                                    for text in state.texts[state.text_page * TEXT_PAGE_SIZE:(state.text_page + 1) * TEXT_PAGE_SIZE]
+                                )),
+                                fg.Conditional(
+                                    len(state.texts) > TEXT_PAGE_SIZE,
+                                    fg.Stack([
+                                        fg.Button(
+                                            "Previous",
+                                            on_click=lambda s: setattr(s, "text_page", max(0, s.text_page - 1))
+                                        ),
+                                        fg.Text(
+                                            f"Texts {state.text_page * TEXT_PAGE_SIZE + 1}-"
+                                            f"{min((state.text_page + 1) * TEXT_PAGE_SIZE, len(state.texts))} of {len(state.texts)}"
+                                        ),
+                                        fg.Button(
+                                            "Next",
+                                            on_click=lambda s: setattr(
+                                                s, "text_page",
+                                                min((len(s.texts) - 1) // TEXT_PAGE_SIZE, s.text_page + 1)
+                                            )
+                                        )
+                                    ], direction="horizontal")
+                                )
                             ]),
                             fg.Text("No text content found")
                         )
@@ -387,12 +545,12 @@ def results_panel(state: AppState) -> fg.Component:
                                 fg.Grid(
                                     [fg.Stack([
                                         fg.Image(
-                                            # Use direct file path for images
-                                            src=f"file://{image['path']}",
+                                            # Thumbnails are generated and cached by the API
+                                            src=f"{API_URL}/api/jobs/{state.job_id}/thumb/{i}",
                                             style={"max-width": "300px", "max-height": "300px"}
                                         ),
                                         fg.Text(f"From {image['source']} {image['page_number'] if image['page_number'] is not None else ''}")
-                                    ]) for image in state.images],
+                                    ]) for i, image in enumerate(state.images)],
                                     columns=3
                                 )
                             ]),
@@ -437,11 +595,27 @@ def results_panel(state: AppState) -> fg.Component:
         )
     ])
 
+# Background tasks running for the lifetime of the app
+_background_tasks: List[asyncio.Task] = []
+
+@app.on_startup
+async def start_background_tasks() -> None:
+    """Warm up the API client and start following job status once the app is up."""
+    _background_tasks.append(asyncio.create_task(warm_up_client()))
+    _background_tasks.append(asyncio.create_task(watch_job_status_loop(app_state)))
+
+@app.on_shutdown
+async def stop_background_tasks() -> None:
+    """Cancel the background tasks and close the API client when the app stops."""
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
+    await close_client()
+
 # Main App Component
 @app.component
 def app_component(state: AppState) -> fg.Component:
-    app.run_async(check_job_status, state)
-    
     return fg.Stack([
         fg.Stack([
             fg.Heading(1, "Owl OCR"),
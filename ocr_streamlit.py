@@ -8,21 +8,24 @@ A Streamlit-based frontend for the Owl OCR API that allows users to:
 - View extracted text, tables, and images
 """
 
-import os
-import time
 import tempfile
-import json
 from pathlib import Path
 from typing import Dict, List, Optional, Union
 
 import streamlit as st
 import httpx
-import base64
-from PIL import Image
+import orjson
 
 # API Configuration
 API_URL = "http://localhost:8000"  # Change if your API is running elsewhere
 
+# Number of extracted texts shown per page of the text tab
+TEXT_PAGE_SIZE = 20
+
+# Longest a status stream read may block before the fragment reruns, so widget
+# interactions are picked up while a job stage runs without status changes
+WATCH_READ_TIMEOUT = 2.0
+
 # Page setup
 st.set_page_config(
     page_title="Owl OCR",
@@ -30,7 +33,27 @@ st.set_page_config(
     layout="wide",
 )
 
+# Shared HTTP client, created once per server process and reused across reruns
+@st.cache_resource
+def get_client():
+    """Return the shared API client so requests reuse keep-alive connections."""
+    return httpx.Client(
+        base_url=API_URL,
+        timeout=60.0,  # Long timeout for large files
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+        http2=True,  # Used when the API is served over HTTPS; gzip is negotiated by default
+    )
+
 # Functions for API communication
+def get_error_detail(response):
+    """Extract the error message from an API error response, which may not be JSON."""
+    if "json" in response.headers.get("content-type", ""):
+        try:
+            return orjson.loads(response.content).get("detail", response.text[:200])
+        except (orjson.JSONDecodeError, AttributeError):
+            pass
+    return response.text[:200] or "Unknown error"
+
 def api_upload_file(file_obj):
     """Upload a file to the API for processing."""
     if not file_obj:
@@ -41,17 +64,12 @@ def api_upload_file(file_obj):
         files = {"file": (file_obj.name, file_obj, file_obj.type)}
         
         with st.spinner("Uploading file..."):
-            with httpx.Client() as client:
-                response = client.post(
-                    f"{API_URL}/api/process", 
-                    files=files,
-                    timeout=60.0  # Long timeout for large files
-                )
+            response = get_client().post("/api/process", files=files)
         
         if response.status_code == 200:
-            return response.json(), None
+            return orjson.loads(response.content), None
         else:
-            error_detail = response.json().get("detail", "Unknown error")
+            error_detail = get_error_detail(response)
             return None, f"API error: {response.status_code} - {error_detail}"
         
     except Exception as e:
@@ -63,46 +81,83 @@ def api_get_job_status(job_id):
         return None, "No job ID provided"
     
     try:
-        with httpx.Client() as client:
-            response = client.get(f"{API_URL}/api/jobs/{job_id}")
+        response = get_client().get(f"/api/jobs/{job_id}")
         
         if response.status_code == 200:
-            return response.json(), None
+            return orjson.loads(response.content), None
         else:
-            error_detail = response.json().get("detail", "Unknown error")
+            error_detail = get_error_detail(response)
             return None, f"API error: {response.status_code} - {error_detail}"
         
     except Exception as e:
         return None, f"Error getting job status: {str(e)}"
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_job_result(job_id):
+    """Fetch a job result once per job; errors raise and are therefore not cached."""
+    response = get_client().get(f"/api/jobs/{job_id}/result")
+    
+    if response.status_code != 200:
+        error_detail = get_error_detail(response)
+        raise RuntimeError(f"API error: {response.status_code} - {error_detail}")
+    
+    return orjson.loads(response.content)
+
 def api_get_job_result(job_id):
     """Get job result from the API."""
     if not job_id:
         return None, "No job ID provided"
     
     try:
-        with httpx.Client() as client:
-            response = client.get(f"{API_URL}/api/jobs/{job_id}/result")
-        
-        if response.status_code == 200:
-            return response.json(), None
-        else:
-            error_detail = response.json().get("detail", "Unknown error")
-            return None, f"API error: {response.status_code} - {error_detail}"
-        
+        return fetch_job_result(job_id), None
+    except RuntimeError as e:
+        return None, str(e)
     except Exception as e:
         return None, f"Error getting job result: {str(e)}"
 
-def get_image_as_base64(image_path):
-    """Convert an image file to base64 for display in HTML."""
-    try:
-        if not os.path.exists(image_path):
-            return None
+
+def api_watch_job_status(job_id, on_update):
+    """
+    Follow job status over server-sent events until the job finishes or no
+    update arrives within WATCH_READ_TIMEOUT.
+    
+    Args:
+        job_id: Job to follow
+        on_update: Callback invoked with the job data after every change
         
-        with open(image_path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode("utf-8")
+    Returns:
+        Latest job data, or None if the stream could not be opened
+    """
+    job_status = None
+    timeout = httpx.Timeout(60.0, read=WATCH_READ_TIMEOUT)
+    try:
+        with get_client().stream("GET", f"/api/jobs/{job_id}/events", timeout=timeout) as response:
+            if response.status_code != 200:
+                return None
+            
+            # Each "data:" line carries the full job data after a change
+            for line in response.iter_lines():
+                if line.startswith("data: "):
+                    job_status = orjson.loads(line[len("data: "):])
+                    on_update(job_status)
+    except httpx.ReadTimeout:
+        # No change for a while; hand control back so the caller can rerun
+        return job_status
     except Exception:
         return None
+    return job_status
+
+@st.cache_resource(show_spinner=False)
+def warm_up_client():
+    """Open a pooled connection to the API once per server so the first upload can reuse it."""
+    try:
+        get_client().get("/api/health")
+        return True
+    except httpx.HTTPError:
+        # The API may not be up yet; the first real request will connect instead
+        return False
+
+warm_up_client()
 
 # Session state initialization
 if "page" not in st.session_state:
@@ -120,9 +175,6 @@ if "job_result" not in st.session_state:
 if "auto_refresh" not in st.session_state:
     st.session_state.auto_refresh = True
 
-if "last_refresh" not in st.session_state:
-    st.session_state.last_refresh = 0
-
 # Helper functions for navigation
 def go_to_upload():
     st.session_state.page = "upload"
@@ -137,6 +189,25 @@ def go_to_status(job_id):
 def go_to_results():
     st.session_state.page = "results"
 
+def render_job_status(job_status):
+    """Render the job status details and progress bar."""
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.write(f"**Job ID:** {job_status['job_id']}")
+        st.write(f"**File:** {job_status['file_name']}")
+        st.write(f"**Status:** {job_status['status']}")
+        st.write(f"**Progress:** {job_status.get('progress', 0)}%")
+        
+        if job_status.get('message'):
+            st.write(f"**Message:** {job_status['message']}")
+    
+    with col2:
+        st.write(f"**Created:** {job_status['created_at']}")
+        st.write(f"**Updated:** {job_status['updated_at']}")
+    
+    st.progress(job_status.get('progress', 0) / 100.0)
+
 def refresh_job_status():
     if st.session_state.job_id:
         job_status, error = api_get_job_status(st.session_state.job_id)
@@ -151,25 +222,67 @@ def refresh_job_status():
         return False
     return False
 
+@st.fragment
+def job_status_fragment():
+    """
+    Job status panel, rerun on its own so status updates and its controls
+    never re-execute the rest of the page.
+    """
+    job_status = st.session_state.job_status
+    
+    # Status is drawn into a placeholder so live updates replace it in place
+    status_placeholder = st.empty()
+    with status_placeholder.container():
+        render_job_status(job_status)
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        # The value comes from st.session_state.auto_refresh via the key
+        st.checkbox("Auto-refresh", key="auto_refresh")
+    
+    with col2:
+        if st.button("Refresh Status"):
+            refresh_job_status()
+            st.rerun(scope="fragment")
+    
+    if job_status["status"] == "completed":
+        with col3:
+            if st.button("View Results", type="primary"):
+                job_result, error = api_get_job_result(st.session_state.job_id)
+                if error:
+                    st.error(error)
+                else:
+                    st.session_state.job_result = job_result
+                    go_to_results()
+                    st.rerun()
+    
+    # Follow pushed status updates instead of polling. Streamlit only acts on
+    # widget interactions at the next st call, so the watch gives up after
+    # WATCH_READ_TIMEOUT without an update and the fragment reruns to reconnect
+    if st.session_state.auto_refresh and job_status["status"] not in ("completed", "failed"):
+        def update_status(new_status):
+            st.session_state.job_status = new_status
+            with status_placeholder.container():
+                render_job_status(new_status)
+        
+        final_status = api_watch_job_status(st.session_state.job_id, update_status)
+        
+        # Auto-navigate to results if job completed
+        if final_status is not None:
+            if final_status["status"] == "completed":
+                job_result, error = api_get_job_result(st.session_state.job_id)
+                if job_result:
+                    st.session_state.job_result = job_result
+                    go_to_results()
+                    st.rerun()
+            st.rerun(scope="fragment")
+
 # Header
 st.title("🦉 Owl OCR")
 st.markdown("Extract text and content from images, PDFs, and PowerPoint files")
 st.divider()
 
-# Auto-refresh job status
-current_time = time.time()
-if (st.session_state.auto_refresh and 
-    st.session_state.page == "status" and 
-    st.session_state.job_id and 
-    current_time - st.session_state.last_refresh > 2):  # Refresh every 2 seconds
-    
-    st.session_state.last_refresh = current_time
-    job_completed = refresh_job_status()
-    
-    # Auto-navigate to results if job completed
-    if job_completed:
-        st.session_state.page = "results"
-
 # Page: File Upload
 if st.session_state.page == "upload":
     st.header("Upload File for OCR Processing")
@@ -203,46 +316,7 @@ elif st.session_state.page == "status":
         st.error("No active job")
         st.button("Back to Upload", on_click=go_to_upload)
     else:
-        job_status = st.session_state.job_status
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.write(f"**Job ID:** {job_status['job_id']}")
-            st.write(f"**File:** {job_status['file_name']}")
-            st.write(f"**Status:** {job_status['status']}")
-            st.write(f"**Progress:** {job_status.get('progress', 0)}%")
-            
-            if job_status.get('message'):
-                st.write(f"**Message:** {job_status['message']}")
-        
-        with col2:
-            st.write(f"**Created:** {job_status['created_at']}")
-            st.write(f"**Updated:** {job_status['updated_at']}")
-        
-        st.progress(job_status.get('progress', 0) / 100.0)
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.checkbox("Auto-refresh", value=st.session_state.auto_refresh, 
-                      key="auto_refresh")
-        
-        with col2:
-            if st.button("Refresh Status"):
-                refresh_job_status()
-                st.rerun()
-        
-        if job_status["status"] == "completed":
-            with col3:
-                if st.button("View Results", type="primary"):
-                    job_result, error = api_get_job_result(st.session_state.job_id)
-                    if error:
-                        st.error(error)
-                    else:
-                        st.session_state.job_result = job_result
-                        go_to_results()
-                        st.rerun()
+        job_status_fragment()
         
         st.button("Back to Upload", on_click=go_to_upload)
 
@@ -250,6 +324,7 @@ elif st.session_state.page == "status":
 elif st.session_state.page == "results":
     st.header("OCR Results")
     
+    # Load results once, then render them in the same run
     if not st.session_state.job_result:
         job_result, error = api_get_job_result(st.session_state.job_id)
         if error:
@@ -258,8 +333,8 @@ elif st.session_state.page == "results":
             st.button("Back to Upload", on_click=go_to_upload)
         else:
             st.session_state.job_result = job_result
-            st.rerun()
-    else:
+    
+    if st.session_state.job_result:
         job_result = st.session_state.job_result
         
         st.write(f"**File:** {job_result['file_name']}")
@@ -270,15 +345,34 @@ elif st.session_state.page == "results":
         # Tab: Extracted Text
         with tab1:
             if job_result.get('texts') and len(job_result['texts']) > 0:
-                for i, text in enumerate(job_result['texts']):
-                    with st.expander(f"Text from {text['source']} {text.get('page_number', '')}", expanded=i==0):
-                        st.text_area(
-                            "Extracted text", 
-                            value=text['text'],
-                            height=300,
-                            key=f"text_{i}"
-                        )
-                        st.button("Copy", key=f"copy_{i}", use_container_width=True)
+                # Only one range of texts is rendered at a time
+                texts = job_result['texts']
+                start = 0
+                if len(texts) > TEXT_PAGE_SIZE:
+                    start = st.selectbox(
+                        "Texts",
+                        range(0, len(texts), TEXT_PAGE_SIZE),
+                        format_func=lambda i: f"{i + 1}-{min(i + TEXT_PAGE_SIZE, len(texts))} of {len(texts)}",
+                        key="text_page"
+                    )
+                page_texts = texts[start:start + TEXT_PAGE_SIZE]
+                
+                if st.toggle("Show as expanders", key="text_expanders"):
+                    for i, text in enumerate(page_texts, start=start):
+                        with st.expander(f"Text from {text['source']} {text.get('page_number', '')}", expanded=i==0):
+                            st.text_area(
+                                "Extracted text", 
+                                value=text['text'],
+                                height=300,
+                                key=f"text_{i}"
+                            )
+                            st.button("Copy", key=f"copy_{i}", use_container_width=True)
+                else:
+                    # One markdown element for the page instead of two widgets per text
+                    st.markdown("\n\n---\n\n".join(
+                        f"#### Text from {text['source']} {text.get('page_number') or ''}\n\n```\n{text['text']}\n```"
+                        for text in page_texts
+                    ))
             else:
                 st.info("No text content found")
         
@@ -298,22 +392,12 @@ elif st.session_state.page == "results":
                 for i, img in enumerate(job_result['images']):
                     with cols[i % 3]:
                         source_label = f"{img['source']} {img.get('page_number', '')}"
-                        try:
-                            # Try to open image from path
-                            image = Image.open(img['path'])
-                            st.image(image, caption=source_label)
-                        except Exception:
-                            # Fallback if direct opening fails
-                            base64_img = get_image_as_base64(img['path'])
-                            if base64_img:
-                                st.markdown(f"""
-                                <div style="text-align: center;">
-                                    <img src="data:image/png;base64,{base64_img}" style="max-width: 100%;">
-                                    <p>{source_label}</p>
-                                </div>
-                                """, unsafe_allow_html=True)
-                            else:
-                                st.error(f"Could not load image: {img['path']}")
+                        # Thumbnails are generated and cached by the API; the browser
+                        # fetches them directly, so nothing is read or encoded here
+                        st.image(
+                            f"{API_URL}/api/jobs/{job_result['job_id']}/thumb/{i}",
+                            caption=source_label
+                        )
             else:
                 st.info("No images found")
         
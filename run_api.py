@@ -22,11 +22,23 @@ if __name__ == "__main__":
     print("Press Ctrl+C to stop the server")
     
     # Start server
-    uvicorn.run(
-        "api.main:app",
-        host=host,
-        port=port,
-        reload=True,  # Enable auto-reload during development
-        workers=4,    # Number of worker processes
-        log_level="info"
-    )
\ No newline at end of file
+    if os.getenv("OWL_DEV"):
+        # Development: single process that reloads on code changes
+        uvicorn.run(
+            "api.main:app",
+            host=host,
+            port=port,
+            reload=True,
+            log_level="info"
+        )
+    else:
+        # Production: one worker per CPU on the uvloop/httptools implementations
+        uvicorn.run(
+            "api.main:app",
+            host=host,
+            port=port,
+            workers=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))),
+            loop="uvloop",
+            http="httptools",
+            log_level="info"
+        )
\ No newline at end of file
@@ -5,6 +5,10 @@ Simplified API without middleware for testing.
 
 import logging
 import os
+import secrets
+from pathlib import Path
+
+import aiofiles
 from fastapi import FastAPI, File, UploadFile, Form
 from typing import Optional
 import uvicorn
@@ -16,6 +20,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Directory for uploaded files
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(os.getcwd(), "uploads"))
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+# Chunk size used when streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 # Create FastAPI application - no middleware
 app = FastAPI(
     title="Owl OCR API (Simple)",
@@ -35,11 +46,25 @@ async def health_check():
 @app.post("/api/process", tags=["Process"])
 async def process_file(file: UploadFile = File(...)):
     """Simple file upload endpoint for testing."""
+    # Stream the upload to disk in chunks without blocking the event loop
+    job_id = secrets.token_hex(16)
+    file_path = os.path.join(UPLOAD_DIR, f"{job_id}_{Path(file.filename or 'upload').name}")
+    size = 0
+    try:
+        async with aiofiles.open(file_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await f.write(chunk)
+                size += len(chunk)
+    finally:
+        await file.close()
+    
     return {
         "status": "accepted",
         "file_name": file.filename,
         "content_type": file.content_type,
-        "job_id": "test-job-123"
+        "file_path": file_path,
+        "size": size,
+        "job_id": job_id
     }
 
 @app.get("/api/jobs/{job_id}", tags=["Jobs"])
@@ -61,4 +86,16 @@ if __name__ == "__main__":
     host = "0.0.0.0"
     print(f"Starting simplified API server at http://{host}:{port}")
     print(f"API documentation available at http://{host}:{port}/docs")
-    uvicorn.run("simple_api:app", host=host, port=port, reload=True)
\ No newline at end of file
+    if os.getenv("OWL_DEV"):
+        # Development: single process that reloads on code changes
+        uvicorn.run("simple_api:app", host=host, port=port, reload=True)
+    else:
+        # Production: multiple workers on the uvloop/httptools implementations
+        uvicorn.run(
+            "simple_api:app",
+            host=host,
+            port=port,
+            workers=int(os.getenv("WEB_CONCURRENCY", "4")),
+            loop="uvloop",
+            http="httptools",
+        )
\ No newline at end of file
@@ -5,15 +5,19 @@ This module provides functions for creating, tracking, and managing OCR processi
 It uses Redis as a backend for job queue management and status tracking.
 """
 
-import json
 import os
+import secrets
+import socket
+import threading
 import time
-import uuid
 from datetime import datetime
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
 
+import orjson
 import redis
+import redis.asyncio as aioredis
 from fastapi import HTTPException
+from rq import Queue
 
 # Redis configuration - would be externalized in production
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
@@ -21,45 +25,191 @@ REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_DB = int(os.getenv("REDIS_DB", "0"))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
 
+# Connection pool size; callers wait for a free connection instead of failing
+REDIS_POOL = int(os.getenv("REDIS_POOL", "64"))
+REDIS_POOL_TIMEOUT = 20  # seconds to wait for a free connection
+
+# Ping idle connections before reuse so stale sockets are replaced transparently
+REDIS_HEALTH_CHECK_INTERVAL = 30  # seconds
+
+# TCP keepalive probing for pooled connections (options missing on some platforms are skipped)
+REDIS_KEEPALIVE_OPTIONS = {
+    option: value
+    for option, value in (
+        (getattr(socket, "TCP_KEEPIDLE", None), 60),
+        (getattr(socket, "TCP_KEEPINTVL", None), 10),
+        (getattr(socket, "TCP_KEEPCNT", None), 3),
+    )
+    if option is not None
+}
+
 # Redis key prefixes
 JOB_PREFIX = "ocr:job:"
 JOB_RESULT_PREFIX = "ocr:result:"
+JOB_EVENTS_PREFIX = "ocr:progress:"
 JOB_LIST = "ocr:jobs"
 
+# Result fields stored as Redis lists of JSON items under <result key>:<field>,
+# so large results can be read back a page at a time
+RESULT_LIST_FIELDS = ("texts", "tables")
+RESULT_PAGE_SIZE = 100
+
+# Approximate number of status events kept in each job's event stream
+JOB_EVENTS_MAXLEN = 100
+
 # Job retention period (in seconds)
 JOB_RETENTION = 60 * 60 * 24  # 24 hours
 
+# Maximum number of jobs deleted per pipeline during cleanup
+CLEANUP_BATCH_SIZE = 1000
+
+# Minimum interval between intermediate progress writes for the same job
+PROGRESS_UPDATE_INTERVAL = 0.25  # seconds
+
+# RQ queue that OCR jobs are dispatched to; when unset, the API processes jobs itself
+OCR_TASK_QUEUE = os.getenv("OCR_TASK_QUEUE")
+OCR_JOB_TIMEOUT = int(os.getenv("OCR_JOB_TIMEOUT", "3600"))  # seconds per job
+
+
+# Jobs are stored as Redis hashes; these fields are converted back from strings
+JOB_INT_FIELDS = ("progress",)
+
+# Redis replies are left as bytes, so large result payloads reach orjson or the
+# HTTP response without a UTF-8 decode; job fields are decoded by decode_job
+
+# Update fields of an existing job hash atomically, without creating missing jobs,
+# and append the same fields to the job's event stream
+# KEYS[1] = job key, KEYS[2] = event stream key,
+# ARGV = ttl, stream maxlen, field1, value1, field2, value2, ...
+UPDATE_JOB_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[2], '*', unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return redis.call('HGETALL', KEYS[1])
+"""
+
 
 # Redis client singleton
 _redis_client = None
+_async_redis_client = None
+_update_job_script = None
+_task_queue = None
+
+# Last flushed progress update per job: job_id -> (monotonic time, job data)
+_last_update: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_last_update_lock = threading.Lock()
 
 
 def get_redis_client() -> redis.Redis:
     """Get or create Redis client singleton."""
     global _redis_client
     if _redis_client is None:
-        _redis_client = redis.Redis(
+        pool = redis.BlockingConnectionPool(
             host=REDIS_HOST,
             port=REDIS_PORT,
             db=REDIS_DB,
             password=REDIS_PASSWORD,
-            decode_responses=True,
+            max_connections=REDIS_POOL,
+            timeout=REDIS_POOL_TIMEOUT,
+            socket_keepalive=True,
+            socket_keepalive_options=REDIS_KEEPALIVE_OPTIONS,
+            health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+            # Sent as CLIENT SETNAME on connect, so CLIENT LIST shows the owning process
+            client_name=f"owl-ocr-{os.getpid()}",
         )
+        _redis_client = redis.Redis(connection_pool=pool)
     return _redis_client
 
 
-def create_job(file_name: str, file_type: str) -> Dict[str, Any]:
+def get_async_redis_client() -> aioredis.Redis:
+    """Get or create the asyncio Redis client used for blocking reads in the API."""
+    global _async_redis_client
+    if _async_redis_client is None:
+        _async_redis_client = aioredis.Redis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            db=REDIS_DB,
+            password=REDIS_PASSWORD,
+            socket_keepalive=True,
+            socket_keepalive_options=REDIS_KEEPALIVE_OPTIONS,
+            health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+            client_name=f"owl-ocr-{os.getpid()}",
+        )
+    return _async_redis_client
+
+
+def get_update_job_script():
+    """Get the status update script, registered once and run via EVALSHA."""
+    global _update_job_script
+    if _update_job_script is None:
+        _update_job_script = get_redis_client().register_script(UPDATE_JOB_SCRIPT)
+    return _update_job_script
+
+
+def get_task_queue() -> Queue:
+    """Get or create the RQ queue OCR jobs are dispatched to."""
+    global _task_queue
+    if _task_queue is None:
+        # The shared client returns raw bytes, which RQ's pickled payloads require
+        _task_queue = Queue(OCR_TASK_QUEUE, connection=get_redis_client(),
+                            default_timeout=OCR_JOB_TIMEOUT)
+    return _task_queue
+
+
+def enqueue_job(job_id: str, func, *args) -> None:
+    """
+    Dispatch a job to the RQ workers.
+    
+    Args:
+        job_id: Job identifier, reused as the RQ job ID
+        func: Function the worker runs
+        *args: Arguments passed to func
+    """
+    # Results and status are tracked in the job keys, so RQ keeps no return value
+    get_task_queue().enqueue(
+        func,
+        *args,
+        job_id=job_id,
+        result_ttl=0,
+        failure_ttl=JOB_RETENTION,
+    )
+
+
+def decode_job(fields: Dict[bytes, bytes]) -> Dict[str, Any]:
+    """
+    Convert a job hash read from Redis back into job data.
+    
+    Args:
+        fields: Field/value mapping as returned by HGETALL
+        
+    Returns:
+        Dictionary with job details
+    """
+    fields = {key.decode(): value.decode() for key, value in fields.items()}
+    for field in JOB_INT_FIELDS:
+        if field in fields:
+            fields[field] = int(fields[field])
+    return fields
+
+
+def create_job(file_name: str, file_type: str, job_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Create a new OCR processing job.
     
     Args:
         file_name: Original name of the uploaded file
         file_type: Type of file (pdf, image, pptx)
+        job_id: Optional pre-generated job identifier
         
     Returns:
         Dictionary with job details including job_id
     """
-    job_id = str(uuid.uuid4())
+    if job_id is None:
+        job_id = secrets.token_hex(16)
     
     # Create timestamp
     now = datetime.now().isoformat()
@@ -74,16 +224,17 @@ def create_job(file_name: str, file_type: str) -> Dict[str, Any]:
         "updated_at": now,
     }
     
-    # Store job in Redis
+    # Store job hash in Redis and add it to the list of jobs in one round-trip
     redis_client = get_redis_client()
-    redis_client.setex(
-        f"{JOB_PREFIX}{job_id}",
-        JOB_RETENTION,
-        json.dumps(job_data)
-    )
-    
-    # Add job to list of jobs
-    redis_client.zadd(JOB_LIST, {job_id: time.time()})
+    job_key = f"{JOB_PREFIX}{job_id}"
+    pipe = redis_client.pipeline(transaction=False)
+    events_key = f"{JOB_EVENTS_PREFIX}{job_id}"
+    pipe.hset(job_key, mapping=job_data)
+    pipe.expire(job_key, JOB_RETENTION)
+    pipe.xadd(events_key, {"status": "pending", "updated_at": now})
+    pipe.expire(events_key, JOB_RETENTION)
+    pipe.zadd(JOB_LIST, {job_id: time.time()})
+    pipe.execute()
     
     return job_data
 
@@ -102,12 +253,12 @@ def get_job(job_id: str) -> Dict[str, Any]:
         HTTPException: If job not found
     """
     redis_client = get_redis_client()
-    job_data = redis_client.get(f"{JOB_PREFIX}{job_id}")
+    job_data = redis_client.hgetall(f"{JOB_PREFIX}{job_id}")
     
     if not job_data:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     
-    return json.loads(job_data)
+    return decode_job(job_data)
 
 
 def update_job_status(job_id: str, status: str, progress: Optional[int] = None, 
@@ -115,6 +266,10 @@ def update_job_status(job_id: str, status: str, progress: Optional[int] = None,
     """
     Update job status.
     
+    Intermediate progress updates arriving within PROGRESS_UPDATE_INTERVAL of
+    the previous write for the same job are dropped; any other status, and
+    progress 100, is always written.
+    
     Args:
         job_id: Unique job identifier
         status: New job status (pending, processing, completed, failed)
@@ -122,36 +277,43 @@ def update_job_status(job_id: str, status: str, progress: Optional[int] = None,
         message: Optional status message
         
     Returns:
-        Updated job data
+        Updated job data, or the last written job data if the update was dropped
         
     Raises:
         HTTPException: If job not found
     """
-    redis_client = get_redis_client()
-    job_key = f"{JOB_PREFIX}{job_id}"
-    job_data_str = redis_client.get(job_key)
-    
-    if not job_data_str:
-        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    now = time.monotonic()
+    is_intermediate = status == "processing" and progress != 100
+    if is_intermediate:
+        with _last_update_lock:
+            last = _last_update.get(job_id)
+        if last is not None and now - last[0] < PROGRESS_UPDATE_INTERVAL:
+            return last[1]
     
-    job_data = json.loads(job_data_str)
-    job_data["status"] = status
-    job_data["updated_at"] = datetime.now().isoformat()
-    
-    # Update optional fields if provided
+    # Only the changed fields are sent, in a single atomic round-trip
+    fields = ["status", status, "updated_at", datetime.now().isoformat()]
     if progress is not None:
-        job_data["progress"] = progress
-    
+        fields += ["progress", progress]
     if message is not None:
-        job_data["message"] = message
+        fields += ["message", message]
     
-    # Save updated job data
-    redis_client.setex(
-        job_key,
-        JOB_RETENTION,
-        json.dumps(job_data)
+    job_fields = get_update_job_script()(
+        keys=[f"{JOB_PREFIX}{job_id}", f"{JOB_EVENTS_PREFIX}{job_id}"],
+        args=[JOB_RETENTION, JOB_EVENTS_MAXLEN, *fields],
     )
     
+    if not job_fields:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    # HGETALL replies to a script arrive as a flat [field, value, ...] list
+    job_data = decode_job(dict(zip(job_fields[::2], job_fields[1::2])))
+    
+    with _last_update_lock:
+        if is_intermediate:
+            _last_update[job_id] = (now, job_data)
+        else:
+            _last_update.pop(job_id, None)
+    
     return job_data
 
 
@@ -162,59 +324,131 @@ def store_job_result(job_id: str, result: Dict[str, Any]) -> None:
     Args:
         job_id: Unique job identifier
         result: Result data to store
+    """
+    # Only the worker processing the job stores its result, so the job isn't re-checked
+    redis_client = get_redis_client()
+    result_key = f"{JOB_RESULT_PREFIX}{job_id}"
+    summary = {key: value for key, value in result.items() if key not in RESULT_LIST_FIELDS}
+    
+    # Store the summary and the list fields together, so readers never see a partial result
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.setex(result_key, JOB_RETENTION, orjson.dumps(summary))
+    for field in RESULT_LIST_FIELDS:
+        list_key = f"{result_key}:{field}"
+        pipe.unlink(list_key)
+        items = result.get(field)
+        if items:
+            pipe.rpush(list_key, *map(orjson.dumps, items))
+            pipe.expire(list_key, JOB_RETENTION)
+    pipe.execute()
+
+
+def get_job_and_result_summary(job_id: str) -> Tuple[Dict[str, Any], Optional[bytes]]:
+    """
+    Get job details and the JSON-encoded result summary in a single Redis round-trip.
+    
+    The summary holds every result field except the RESULT_LIST_FIELDS.
+    
+    Args:
+        job_id: Unique job identifier
+        
+    Returns:
+        Tuple of (job details, summary JSON bytes or None if not stored yet)
         
     Raises:
         HTTPException: If job not found
     """
     redis_client = get_redis_client()
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hgetall(f"{JOB_PREFIX}{job_id}")
+    pipe.get(f"{JOB_RESULT_PREFIX}{job_id}")
+    job_data, summary = pipe.execute()
     
-    # Verify job exists
-    if not redis_client.exists(f"{JOB_PREFIX}{job_id}"):
+    if not job_data:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     
-    # Store result
-    redis_client.setex(
-        f"{JOB_RESULT_PREFIX}{job_id}",
-        JOB_RETENTION,
-        json.dumps(result)
-    )
+    return decode_job(job_data), summary
 
 
-def get_job_result(job_id: str) -> Dict[str, Any]:
+def iter_result_json(job_id: str, summary: bytes) -> Iterator[bytes]:
     """
-    Get job result by job ID.
+    Yield a stored result as JSON, reading its list fields a page at a time.
+    
+    Args:
+        job_id: Unique job identifier
+        summary: Result summary as returned by get_job_and_result_summary
+        
+    Yields:
+        Consecutive chunks of the result JSON object
+    """
+    redis_client = get_redis_client()
+    result_key = f"{JOB_RESULT_PREFIX}{job_id}"
+    
+    # Reopen the summary object and append each list field to it
+    yield summary[:-1]
+    separator = b"," if summary != b"{}" else b""
+    for field in RESULT_LIST_FIELDS:
+        yield separator + b'"' + field.encode() + b'":['
+        separator = b","
+        start = 0
+        while True:
+            items = redis_client.lrange(f"{result_key}:{field}", start, start + RESULT_PAGE_SIZE - 1)
+            if not items:
+                break
+            yield (b"," if start else b"") + b",".join(items)
+            if len(items) < RESULT_PAGE_SIZE:
+                break
+            start += RESULT_PAGE_SIZE
+        yield b"]"
+    yield b"}"
+
+
+def get_job_snapshot(job_id: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Get job details together with the ID of the latest event in its stream.
+    
+    Both are read in one transaction, so reading the stream from the returned
+    ID yields exactly the updates made after the snapshot.
     
     Args:
         job_id: Unique job identifier
         
     Returns:
-        Dictionary with job result data
+        Tuple of (job details, last event ID)
         
     Raises:
-        HTTPException: If job or result not found
+        HTTPException: If job not found
     """
     redis_client = get_redis_client()
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.hgetall(f"{JOB_PREFIX}{job_id}")
+    pipe.xrevrange(f"{JOB_EVENTS_PREFIX}{job_id}", count=1)
+    job_data, last_events = pipe.execute()
     
-    # First check if job exists
-    if not redis_client.exists(f"{JOB_PREFIX}{job_id}"):
+    if not job_data:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     
-    # Then check for result
-    result_data = redis_client.get(f"{JOB_RESULT_PREFIX}{job_id}")
-    
-    if not result_data:
-        job_data = get_job(job_id)
-        if job_data.get("status") == "failed":
-            raise HTTPException(
-                status_code=400,
-                detail=f"Job {job_id} failed: {job_data.get('message', 'Unknown error')}"
-            )
-        raise HTTPException(
-            status_code=404, 
-            detail=f"Result not available yet for job {job_id}"
-        )
+    return decode_job(job_data), last_events[0][0].decode() if last_events else "0-0"
+
+
+async def read_job_events(job_id: str, last_id: str, block_ms: int) -> list:
+    """
+    Wait for status events newer than last_id in a job's event stream.
     
-    return json.loads(result_data)
+    Args:
+        job_id: Unique job identifier
+        last_id: ID of the last event already seen
+        block_ms: Maximum time to wait for a new event (milliseconds)
+        
+    Returns:
+        List of (event ID, changed job fields) tuples, empty if none arrived in time
+    """
+    reply = await get_async_redis_client().xread(
+        {f"{JOB_EVENTS_PREFIX}{job_id}": last_id}, block=block_ms
+    )
+    if not reply:
+        return []
+    return [(event_id.decode(), decode_job(fields)) for event_id, fields in reply[0][1]]
 
 
 def clean_old_jobs() -> int:
@@ -230,13 +464,18 @@ def clean_old_jobs() -> int:
     cutoff = time.time() - JOB_RETENTION
     old_job_ids = redis_client.zrangebyscore(JOB_LIST, 0, cutoff)
     
-    count = 0
-    for job_id in old_job_ids:
-        # Delete job data and result
-        redis_client.delete(f"{JOB_PREFIX}{job_id}", f"{JOB_RESULT_PREFIX}{job_id}")
-        count += 1
+    # Delete job data and results in bounded pipelines; UNLINK frees the
+    # memory in a background thread instead of blocking Redis
+    pipe = redis_client.pipeline(transaction=False)
+    for start in range(0, len(old_job_ids), CLEANUP_BATCH_SIZE):
+        for job_id in old_job_ids[start:start + CLEANUP_BATCH_SIZE]:
+            job_id = job_id.decode()
+            result_key = f"{JOB_RESULT_PREFIX}{job_id}"
+            pipe.unlink(f"{JOB_PREFIX}{job_id}", f"{JOB_EVENTS_PREFIX}{job_id}", result_key,
+                         *(f"{result_key}:{field}" for field in RESULT_LIST_FIELDS))
+        pipe.execute()
     
     # Remove from jobs list
     redis_client.zremrangebyscore(JOB_LIST, 0, cutoff)
     
-    return count
\ No newline at end of file
+    return len(old_job_ids)
\ No newline at end of file
@@ -7,6 +7,7 @@ It handles long-running OCR processes and updates job status in the queue.
 
 import logging
 import os
+import re
 import shutil
 import tempfile
 import time
@@ -17,17 +18,23 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 from src.jobs.queue import update_job_status, store_job_result
 
 # Import file processors
+from src.utils.file_type import get_file_type
 from src.utils.parse_image import extract_image_text
 from src.utils.parse_pdf import extract_pdf_text_tables_images
 from src.utils.parse_pptx import extract_pptx_text_tables_images
+from src.utils.tesseract import OCR_CORE_BUDGET
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
 logger = logging.getLogger(__name__)
 
+# File names of page images written by the PDF parser and slide images by the PPTX parser
+PAGE_IMAGE_RE = re.compile(r"page_(\d+)\.png$")
+SLIDE_IMAGE_RE = re.compile(r"slide(\d+)_img")
+
+# Processes used to OCR the pages of a single PDF in parallel. process_file already runs
+# in one of OCR_WORKERS pool processes (or an RQ worker), so the two pool sizes multiply;
+# by default the cores are split between them rather than giving every job a full set.
+PDF_OCR_WORKERS = int(os.getenv("PDF_OCR_WORKERS", str(OCR_CORE_BUDGET)))
+
 
 class ProcessorResult:
     """Container for processing results."""
@@ -96,14 +103,10 @@ def process_file(
                           message=f"Detected file type: {file_type}")
         
         # Process file based on type
-        if file_type == "image":
-            result = process_image(job_id, file_path, output_dir)
-        elif file_type == "pdf":
-            result = process_pdf(job_id, file_path, output_dir)
-        elif file_type == "pptx":
-            result = process_pptx(job_id, file_path, output_dir)
-        else:
+        processor = PROCESSORS.get(file_type)
+        if processor is None:
             raise ValueError(f"Unsupported file type: {file_type}")
+        result = processor(job_id, file_path, output_dir)
         
         # Create result object
         processing_result = {
@@ -124,17 +127,18 @@ def process_file(
         if output_format == "json" and "temp_dir" in locals():
             shutil.rmtree(temp_dir, ignore_errors=True)
         
+        # Store result before publishing completion, since clients fetch it
+        # as soon as they see the status change
+        store_job_result(job_id, processing_result)
+        
         # Update job status to completed
         update_job_status(job_id, "completed", progress=100, 
                           message="Processing completed successfully")
         
-        # Store result
-        store_job_result(job_id, processing_result)
-        
         return processing_result
         
     except Exception as e:
-        logger.error(f"Error processing job {job_id}: {str(e)}", exc_info=True)
+        logger.error("Error processing job %s: %s", job_id, e, exc_info=True)
         # Update job status to failed
         update_job_status(job_id, "failed", message=f"Processing failed: {str(e)}")
         
@@ -146,30 +150,6 @@ def process_file(
         raise
 
 
-def get_file_type(file_path: str) -> Optional[str]:
-    """
-    Determine file type based on file extension.
-    
-    Args:
-        file_path: Path to the file
-        
-    Returns:
-        File type (image, pdf, pptx) or None if unsupported
-    """
-    ext = Path(file_path).suffix.lower()
-    
-    file_type_map = {
-        '.pptx': 'pptx',
-        '.ppt': 'pptx',
-        '.png': 'image',
-        '.jpeg': 'image',
-        '.jpg': 'image',
-        '.pdf': 'pdf',
-    }
-    
-    return file_type_map.get(ext)
-
-
 def process_image(job_id: str, file_path: str, output_dir: str) -> ProcessorResult:
     """
     Process an image file.
@@ -232,7 +212,9 @@ def process_pdf(job_id: str, file_path: str, output_dir: str) -> ProcessorResult
     os.makedirs(images_dir, exist_ok=True)
     
     # Extract text, tables, and images
-    texts, tables_html = extract_pdf_text_tables_images(file_path, images_dir=images_dir)
+    texts, tables_html = extract_pdf_text_tables_images(
+        file_path, images_dir=images_dir, max_workers=PDF_OCR_WORKERS
+    )
     
     # Create output file paths
     out_text = os.path.join(output_dir, f"{base_name}.txt")
@@ -241,38 +223,22 @@ def process_pdf(job_id: str, file_path: str, output_dir: str) -> ProcessorResult
     update_job_status(job_id, "processing", progress=70, 
                       message="Processing PDF pages")
     
-    # Write text to file
-    with open(out_text, "w", encoding="utf-8") as f:
-        for t in texts:
-            f.write(t.strip() + "\n\n")
-    
-    # Write tables to file
-    with open(out_tables, "w", encoding="utf-8") as f:
-        for html in tables_html:
-            f.write(html + "\n\n")
+    # Write text and tables to file, each in a single write
+    Path(out_text).write_text("".join(t.strip() + "\n\n" for t in texts), encoding="utf-8")
+    Path(out_tables).write_text("".join(html + "\n\n" for html in tables_html), encoding="utf-8")
     
     update_job_status(job_id, "processing", progress=90, 
                       message="PDF processing completed, preparing results")
     
     # Get image files
     image_files = []
-    if os.path.exists(images_dir):
-        for img_file in os.listdir(images_dir):
-            if img_file.startswith("page_") and img_file.endswith(".png"):
-                try:
-                    page_num = int(img_file.replace("page_", "").replace(".png", ""))
-                    image_files.append({
-                        "path": os.path.join(images_dir, img_file),
-                        "source": "page",
-                        "page_number": page_num
-                    })
-                except ValueError:
-                    # If page number can't be parsed, just add the image without a page number
-                    image_files.append({
-                        "path": os.path.join(images_dir, img_file),
-                        "source": "page",
-                        "page_number": None
-                    })
+    for img_path in Path(images_dir).glob("page_*.png"):
+        match = PAGE_IMAGE_RE.match(img_path.name)
+        image_files.append({
+            "path": str(img_path),
+            "source": "page",
+            "page_number": int(match.group(1)) if match else None
+        })
     
     # Create result object
     result = ProcessorResult()
@@ -344,40 +310,22 @@ def process_pptx(job_id: str, file_path: str, output_dir: str) -> ProcessorResul
     update_job_status(job_id, "processing", progress=70, 
                       message="Processing PowerPoint slides")
     
-    # Write text to file
-    with open(out_text, "w", encoding="utf-8") as f:
-        for t in texts:
-            f.write(t.strip() + "\n\n")
-    
-    # Write tables to file
-    with open(out_tables, "w", encoding="utf-8") as f:
-        for html in tables_html:
-            f.write(html + "\n\n")
+    # Write text and tables to file, each in a single write
+    Path(out_text).write_text("".join(t.strip() + "\n\n" for t in texts), encoding="utf-8")
+    Path(out_tables).write_text("".join(html + "\n\n" for html in tables_html), encoding="utf-8")
     
     update_job_status(job_id, "processing", progress=90, 
                       message="PowerPoint processing completed, preparing results")
     
-    # Get image files
+    # Get image files (e.g., slide3_img2.png)
     image_files = []
-    if os.path.exists(images_dir):
-        for img_file in os.listdir(images_dir):
-            if img_file.startswith("slide") and "_img" in img_file:
-                try:
-                    # Extract slide and image numbers from filename (e.g., slide3_img2.png)
-                    slide_part = img_file.split("_")[0]
-                    slide_num = int(slide_part.replace("slide", ""))
-                    image_files.append({
-                        "path": os.path.join(images_dir, img_file),
-                        "source": "slide",
-                        "page_number": slide_num
-                    })
-                except ValueError:
-                    # If slide number can't be parsed, just add the image without a slide number
-                    image_files.append({
-                        "path": os.path.join(images_dir, img_file),
-                        "source": "slide",
-                        "page_number": None
-                    })
+    for img_path in Path(images_dir).glob("slide*_img*"):
+        match = SLIDE_IMAGE_RE.match(img_path.name)
+        image_files.append({
+            "path": str(img_path),
+            "source": "slide",
+            "page_number": int(match.group(1)) if match else None
+        })
     
     # Create result object
     result = ProcessorResult()
@@ -390,4 +338,12 @@ def process_pptx(job_id: str, file_path: str, output_dir: str) -> ProcessorResul
         "images_dir": images_dir
     }
     
-    return result
\ No newline at end of file
+    return result
+
+
+# Processor for each file type, used by process_file
+PROCESSORS = {
+    "image": process_image,
+    "pdf": process_pdf,
+    "pptx": process_pptx,
+}
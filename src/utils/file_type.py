@@ -0,0 +1,25 @@
+"""
+file_type.py
+
+File type detection shared by the CLI and the API servers.
+"""
+
+import os
+
+# Map of file extension to parser type
+FILE_TYPE_MAP = {
+    '.pptx': 'pptx',
+    '.ppt': 'pptx',  # Treat .ppt as .pptx for now
+    '.png': 'image',
+    '.jpeg': 'image',
+    '.jpg': 'image',
+    '.pdf': 'pdf',
+    # Future file types can be added here:
+    # '.docx': 'docx',
+    # '.doc': 'docx',
+}
+
+
+def get_file_type(file_path):
+    """Determine file type based on file extension."""
+    return FILE_TYPE_MAP.get(os.path.splitext(file_path)[1].lower())
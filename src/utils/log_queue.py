@@ -0,0 +1,53 @@
+"""
+log_queue.py
+
+Non-blocking logging setup shared by the API servers.
+
+Log calls only enqueue the record; a QueueListener thread formats it
+(including any traceback) and writes it out, keeping I/O off the event loop.
+"""
+
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Enqueue records unformatted so formatting happens on the listener thread."""
+
+    def prepare(self, record):
+        # The queue never leaves the process, so the record can be passed as-is
+        return record
+
+
+def setup_queue_logging(level=logging.INFO,
+                        fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s"):
+    """
+    Route root logging through a queue drained by a background thread.
+
+    Args:
+        level: Root logger level
+        fmt: Format string applied on the listener thread
+
+    Returns:
+        QueueListener: The started listener, stopped automatically at exit
+    """
+    log_queue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(fmt))
+
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    logging.basicConfig(level=level, handlers=[DeferredQueueHandler(log_queue)])
+    listener.start()
+    atexit.register(listener.stop)
+
+    # Forked workers (e.g. the OCR process pool) have no listener thread,
+    # so they log straight to the stream instead of into a dead queue
+    os.register_at_fork(
+        after_in_child=lambda: logging.basicConfig(level=level, format=fmt, force=True)
+    )
+
+    return listener
@@ -8,39 +8,106 @@ Supports PNG, JPEG, JPG formats.
 Requirements:
     pip install pytesseract Pillow
     sudo apt install tesseract-ocr
+
+Optional:
+    pip install tesserocr  # in-process engine, avoids a tesseract subprocess per image
 """
 
 import argparse
+import io
 import os
 from pathlib import Path
 from PIL import Image
 import pytesseract
 
+from src.utils.tesseract import TESSERACT_CONFIG, get_tess_api
+
+# Longest image edge passed to OCR; roughly a letter-size page at 300 DPI
+MAX_OCR_EDGE = 3500
+
+
+def prepare_for_ocr(image):
+    """
+    Convert an image to grayscale and cap its size before OCR.
+    
+    Args:
+        image: PIL image
+        
+    Returns:
+        PIL.Image: Grayscale image no larger than MAX_OCR_EDGE on either side
+    """
+    # Flatten transparency onto white so transparent areas don't turn black
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        image = image.convert("RGBA")
+        image = Image.alpha_composite(Image.new("RGBA", image.size, "white"), image)
+    
+    image = image.convert("L")
+    if max(image.size) > MAX_OCR_EDGE:
+        image.thumbnail((MAX_OCR_EDGE, MAX_OCR_EDGE), Image.Resampling.LANCZOS)
+    return image
+
+
+def ocr_image(image):
+    """
+    Perform OCR on an opened image.
+    
+    Args:
+        image: PIL image
+        
+    Returns:
+        str: Extracted text
+    """
+    api = get_tess_api()
+    if api is None:
+        # Fall back to running the tesseract binary
+        return pytesseract.image_to_string(image, config=TESSERACT_CONFIG)
+    api.SetImage(image)
+    return api.GetUTF8Text()
+
 
 def extract_image_text(image_path):
     """
     Extract text from an image using OCR.
     
     Args:
-        image_path: Path to the image file
+        image_path: Path to the image file, raw image bytes, or a PIL image
         
     Returns:
         str: Extracted text from the image
     """
     try:
-        # Open the image
-        image = Image.open(image_path)
+        # Open the image, decoding in-memory uploads without touching disk
+        if isinstance(image_path, Image.Image):
+            image = image_path
+        elif isinstance(image_path, (bytes, bytearray)):
+            image = Image.open(io.BytesIO(image_path))
+        else:
+            image = Image.open(image_path)
         
         # Perform OCR on the image
-        text = pytesseract.image_to_string(image)
+        text = ocr_image(prepare_for_ocr(image))
         
         return text.strip()
         
     except Exception as e:
-        print(f"Error processing image {image_path}: {e}")
+        label = image_path if isinstance(image_path, (str, os.PathLike)) else "<in-memory image>"
+        print(f"Error processing image {label}: {e}")
         return f"Error processing image: {e}"
 
 
+def extract_image_texts(image_paths):
+    """
+    Extract text from several images in one call.
+    
+    Args:
+        image_paths: List of image file paths, raw image bytes, or PIL images
+        
+    Returns:
+        list: Extracted text for each image, in the same order
+    """
+    return [extract_image_text(image_path) for image_path in image_paths]
+
+
 def main(args=None):
     if args is None:
         # Called directly, parse command line arguments
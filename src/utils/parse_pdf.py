@@ -6,79 +6,554 @@ Extracts text, tables, and OCR from PDF files.
 Supports text extraction and image OCR within PDFs.
 
 Requirements:
-    pip install unstructured[all-docs] pdf2image pytesseract
+    pip install unstructured[all-docs] pypdfium2 pytesseract
     sudo apt install poppler-utils tesseract-ocr
+
+Optional:
+    pip install tesserocr  # in-process engine, avoids a tesseract subprocess per page
 """
 
 import argparse
+import asyncio
+import io
 import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
+from itertools import repeat
 from pathlib import Path
-from unstructured.partition.pdf import partition_pdf
-from unstructured.documents.elements import Table
-from pdf2image import convert_from_path
-from PIL import Image
-import pytesseract
 
+from src.utils.tables import TABLE_HTML_PLACEHOLDER, get_table_html_getter
+from src.utils.tesseract import (
+    OCR_CORE_BUDGET,
+    TESSERACT_CONFIG,
+    TESSERACT_OEM,
+    TESSERACT_PSM,
+    get_tess_api,
+    init_ocr_process,
+)
+
+# unstructured, pypdfium2 and pytesseract are imported inside the functions that
+# use them, so the CLI's --help and argument errors don't pay for loading them
+
+# Page render resolution (150 DPI) and colour mode; 8-bit grayscale is all
+# tesseract needs and a third of the bytes of RGB
+RENDER_DPI = int(os.getenv("PDF_RENDER_DPI", "150"))
+RENDER_SCALE = RENDER_DPI / 72
+RENDER_GRAYSCALE = True
+
+# Longest rendered page edge in pixels; oversized pages (A3, posters) are rendered
+# at a lower DPI, since larger inputs slow tesseract down without helping accuracy
+MAX_RENDER_EDGE = int(os.getenv("PDF_MAX_RENDER_EDGE", "2000"))
+
+# Number of processes rendering pages concurrently when OCR'ing within one process,
+# defaulting to this worker's share of the cores
+RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(OCR_CORE_BUDGET)))
+
+# PDFium is not thread-safe, so document access within a process is serialized
+_pdfium_lock = threading.Lock()
+
+# Number of tesseract processes OCR'ing batches of pages concurrently within one PDF,
+# defaulting to this worker's share of the cores
+OCR_CONCURRENCY = int(os.getenv("OCR_CONCURRENCY", str(OCR_CORE_BUDGET)))
 
-def extract_pdf_text_tables_images(pdf_path, images_dir=None):
+# Page images are saved with fast, light PNG compression; encode time matters more than size
+PNG_COMPRESS_LEVEL = 1
+
+# Buffer size for the CLI's text and table output files (1 MiB)
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Pages with at least this much embedded text are born-digital and not OCR'd
+MIN_EMBEDDED_TEXT_CHARS = 20
+
+
+def extract_pdf_elements(pdf_path):
     """
-    Extract text, tables, and OCR from PDF.
+    Extract embedded text and tables from PDF.
     
     Args:
         pdf_path: Path to the PDF file
-        images_dir: Directory to save extracted images (optional)
         
     Returns:
-        tuple: (text_runs, tables_html)
+        tuple: (text_runs, tables_html, text_pages), where text_pages is the set of
+            born-digital page numbers that need no OCR
     """
-    # 1) Partition PDF into text + tables
-    elements = partition_pdf(filename=pdf_path)
     text_runs = []
     tables_html = []
+    page_text_chars = {}
+    # Bound appends, looked up once rather than per record
+    append = {"text": text_runs.append, "table": tables_html.append}
+    for kind, content in iter_pdf_element_records(pdf_path, page_text_chars):
+        append[kind](content)
+    return text_runs, tables_html, get_text_pages(page_text_chars)
+
+
+def get_text_pages(page_text_chars):
+    """
+    Pick the born-digital pages, whose embedded text makes OCR unnecessary.
+    
+    Such pages are still rendered, so every page has an image.
+    
+    Args:
+        page_text_chars: Embedded text length of each page, as filled by iter_pdf_element_records
+        
+    Returns:
+        set: 1-based numbers of the pages not to OCR
+    """
+    return {page for page, chars in page_text_chars.items() if chars >= MIN_EMBEDDED_TEXT_CHARS}
+
+
+def iter_pdf_element_records(pdf_path, page_text_chars=None):
+    """
+    Yield embedded text and tables from PDF as tagged records.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_text_chars: Optional dict filled with the embedded text length of each page
+        
+    Yields:
+        tuple: ("text", text_run) or ("table", table_html)
+    """
+    from unstructured.partition.pdf import partition_pdf
+    from unstructured.documents.elements import Table
+
+    elements = partition_pdf(filename=pdf_path)
+    table_html = get_table_html_getter()
+
+    # Bind per-element lookups to locals outside the loop
+    count_chars = page_text_chars is not None
+    chars_for_page = page_text_chars.get if count_chars else None
 
     for el in elements:
-        if isinstance(el, Table):
-            # Render table as HTML
-            try:
-                # Try to get HTML from metadata first
-                html = getattr(el.metadata, 'text_as_html', None)
-                if not html:
-                    # Fallback to converting table data to HTML
-                    html = "<table>"
-                    if hasattr(el, 'metadata') and hasattr(el.metadata, 'text_as_html'):
-                        html = el.metadata.text_as_html
-                    else:
-                        # Create basic HTML table from table data
-                        html = "<table><tr><td>Table content</td></tr></table>"
-            except Exception as e:
-                print(f"Warning: failed to render table as HTML: {e}")
-                html = "<table><tr><td>Table content (rendering failed)</td></tr></table>"
-            tables_html.append(html)
+        # Exact type check is a pointer compare; partition_pdf never returns Table subclasses
+        if type(el) is Table:
+            # Render table as HTML, falling back to a placeholder when none was inferred
+            yield "table", table_html(el) or TABLE_HTML_PLACEHOLDER
         else:
-            text_runs.append(el.text)
+            text = el.text
+            if count_chars and text:
+                page_number = el.metadata.page_number
+                if page_number is not None:
+                    page_text_chars[page_number] = chars_for_page(page_number, 0) + len(text.strip())
+            yield "text", text
+
+
+def get_pdf_page_count(pdf_path):
+    """
+    Get the number of pages in a PDF.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        
+    Returns:
+        int: Number of pages
+    """
+    import pypdfium2 as pdfium
+
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+
+def render_page(pdf_path, page_idx):
+    """
+    Render a single PDF page to an image in-process with PDFium.
+    
+    Pages are rendered at RENDER_DPI unless that would make their longest
+    edge exceed MAX_RENDER_EDGE pixels, in which case the scale is reduced.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_idx: 1-based page number
+        
+    Returns:
+        PIL.Image: Rendered page
+    """
+    import pypdfium2 as pdfium
+
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            page = pdf[page_idx - 1]
+            try:
+                width, height = page.get_size()
+                scale = min(RENDER_SCALE, MAX_RENDER_EDGE / max(width, height, 1))
+                return page.render(scale=scale, grayscale=RENDER_GRAYSCALE).to_pil()
+            finally:
+                page.close()
+        finally:
+            pdf.close()
+
+
+def ocr_page(image):
+    """
+    Perform OCR on a rendered page image.
+    
+    Uses the thread's long-lived tesserocr engine when available, so the
+    language model is loaded once per worker rather than once per page.
+    
+    Args:
+        image: PIL image of the page
+        
+    Returns:
+        str: Extracted text, stripped
+    """
+    api = get_tess_api()
+    if api is None:
+        # Fall back to running the tesseract binary
+        import pytesseract
+
+        return pytesseract.image_to_string(image, config=TESSERACT_CONFIG).strip()
+    api.SetImage(image)
+    return api.GetUTF8Text().strip()
 
-    # 2) Extract and OCR images from PDF pages
+
+def ocr_pdf_page(pdf_path, page_idx, images_dir):
+    """
+    Render, save and OCR a single PDF page.
+    
+    Self-contained so it can run in a worker process; only the page
+    number goes in and only the text comes back.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_idx: 1-based page number
+        images_dir: Directory to save the page image, or None to not save it
+        
+    Returns:
+        str or None: "Page N (OCR): ..." text run, or None if nothing was found
+    """
+    try:
+        image = render_page(pdf_path, page_idx)
+    except Exception as e:
+        print(f"Warning: Failed to render page {page_idx} of PDF: {e}")
+        return None
+
+    if images_dir is not None:
+        os.makedirs(images_dir, exist_ok=True)
+        img_filename = os.path.join(images_dir, f"page_{page_idx}.png")
+        image.save(img_filename, "PNG", compress_level=PNG_COMPRESS_LEVEL)
+
+    return ocr_page_text_run(image, page_idx)
+
+
+def save_page_image(pdf_path, page_idx, images_dir):
+    """
+    Render a single PDF page and save it as a PNG.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_idx: 1-based page number
+        images_dir: Directory to save the page image
+        
+    Returns:
+        str or None: Path of the saved image, or None if the page failed to render
+    """
+    try:
+        image = render_page(pdf_path, page_idx)
+    except Exception as e:
+        print(f"Warning: Failed to render page {page_idx} of PDF: {e}")
+        return None
+
+    img_filename = os.path.join(images_dir, f"page_{page_idx}.png")
+    image.save(img_filename, "PNG", compress_level=PNG_COMPRESS_LEVEL)
+    return img_filename
+
+
+def render_page_pnm(pdf_path, page_idx):
+    """
+    Render a single PDF page to uncompressed PNM bytes for OCR without saving it.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_idx: 1-based page number
+        
+    Returns:
+        bytes or None: PNM image data, or None if the page failed to render
+    """
     try:
-        # Convert PDF pages to images
-        images = convert_from_path(pdf_path)
-        
-        for page_idx, image in enumerate(images, start=1):
-            if images_dir is not None:
-                os.makedirs(images_dir, exist_ok=True)
-                img_filename = os.path.join(images_dir, f"page_{page_idx}.png")
-                image.save(img_filename, "PNG")
-                
-                # Perform OCR on the page image
+        image = render_page(pdf_path, page_idx)
+    except Exception as e:
+        print(f"Warning: Failed to render page {page_idx} of PDF: {e}")
+        return None
+
+    # PNM is a raw pixel dump, so unlike PNG there is no deflate pass to pay for
+    buffer = io.BytesIO()
+    image.save(buffer, "PPM")
+    return buffer.getvalue()
+
+
+async def run_tesseract_async(image_arg, image_data=None):
+    """
+    Run tesseract on an image or image list file without blocking the event loop.
+    
+    Args:
+        image_arg: Path to an image, a text file listing one image path per line,
+            or "stdin" to read image_data
+        image_data: Image file contents piped to tesseract when image_arg is "stdin"
+        
+    Returns:
+        str: Recognized text; tesseract ends each image's text with a form feed
+    """
+    import pytesseract
+
+    # One OpenMP thread per tesseract; parallelism comes from running several at once
+    proc = await asyncio.create_subprocess_exec(
+        pytesseract.pytesseract.tesseract_cmd, image_arg, "stdout",
+        "--oem", str(TESSERACT_OEM), "--psm", str(TESSERACT_PSM),
+        stdin=asyncio.subprocess.DEVNULL if image_data is None else asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env={**os.environ, "OMP_THREAD_LIMIT": "1"},
+    )
+    stdout, stderr = await proc.communicate(image_data)
+    if proc.returncode != 0:
+        raise RuntimeError(stderr.decode(errors="replace").strip())
+    return stdout.decode("utf-8")
+
+
+async def ocr_image_files_async(image_paths):
+    """
+    OCR several image files with a single tesseract process.
+    
+    The engine and language model are loaded once for the whole list instead
+    of once per image.
+    
+    Args:
+        image_paths: Paths of the images to OCR
+        
+    Returns:
+        list: Extracted text for each image, stripped, in the same order
+    """
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", encoding="utf-8") as list_file:
+        list_file.write("".join(os.path.abspath(path) + "\n" for path in image_paths))
+        list_file.flush()
+        output = await run_tesseract_async(list_file.name)
+
+    texts = output.split("\f")
+    if len(texts) < len(image_paths):
+        raise RuntimeError(f"tesseract returned {len(texts)} pages for {len(image_paths)} images")
+    return [text.strip() for text in texts[:len(image_paths)]]
+
+
+@cache
+def get_render_pool():
+    """Process pool rendering pages for ocr_pdf_pages, started once per process and reused."""
+    return ProcessPoolExecutor(max_workers=RENDER_WORKERS)
+
+
+async def ocr_pdf_pages(pdf_path, pages, page_count, images_dir, progress_cb=None):
+    """
+    Render, save and OCR pages of a PDF.
+    
+    Pages are split into up to OCR_CONCURRENCY contiguous batches that run
+    concurrently. When the images are saved, each batch is OCR'd by a single
+    tesseract process; otherwise pages are piped to tesseract from memory.
+    Pages are rendered in a shared pool of RENDER_WORKERS processes, and
+    in-memory batches render the next page while the current one is OCR'd.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        pages: 1-based numbers of the pages to OCR, in order
+        page_count: Number of pages in the PDF, passed to progress_cb
+        images_dir: Directory to save the page images, or None to not save them
+        progress_cb: Optional callback(page_idx, page_count) called after each page is OCR'd
+        
+    Returns:
+        list: "Page N (OCR): ..." text runs in page order, skipping pages without text
+    """
+    if images_dir is not None:
+        os.makedirs(images_dir, exist_ok=True)
+    batch_size = -(-len(pages) // min(OCR_CONCURRENCY, len(pages)))
+
+    # PDFium renders one page at a time per process, so with several pages
+    # rendering is spread over worker processes instead of one thread
+    loop = asyncio.get_running_loop()
+    render_pool = get_render_pool() if min(RENDER_WORKERS, len(pages)) > 1 else None
+
+    def render(func, *args):
+        if render_pool is None:
+            return asyncio.to_thread(func, *args)
+        return loop.run_in_executor(render_pool, func, *args)
+
+    async def ocr_batch_in_memory(batch):
+        text_runs = []
+        # Render one page ahead, so the next page is rasterized while this one is OCR'd
+        pending = asyncio.ensure_future(render(render_page_pnm, pdf_path, batch[0]))
+        for i, page_idx in enumerate(batch):
+            pnm = await pending
+            if i + 1 < len(batch):
+                pending = asyncio.ensure_future(render(render_page_pnm, pdf_path, batch[i + 1]))
+            if pnm is not None:
                 try:
-                    text_from_image = pytesseract.image_to_string(image)
-                    if text_from_image.strip():
-                        text_runs.append(f"Page {page_idx} (OCR): {text_from_image.strip()}")
+                    text = (await run_tesseract_async("stdin", pnm)).strip()
+                    if text:
+                        text_runs.append(f"Page {page_idx} (OCR): {text}")
                 except Exception as e:
                     print(f"Warning: OCR failed for page {page_idx}: {e}")
-                    
+            if progress_cb is not None:
+                progress_cb(page_idx, page_count)
+        return text_runs
+
+    async def ocr_batch(batch):
+        if images_dir is None:
+            return await ocr_batch_in_memory(batch)
+
+        rendered = []
+        for page_idx in batch:
+            img_filename = await render(save_page_image, pdf_path, page_idx, images_dir)
+            if img_filename is not None:
+                rendered.append((page_idx, img_filename))
+
+        try:
+            texts = await ocr_image_files_async([path for _, path in rendered]) if rendered else []
+        except Exception as e:
+            # Fall back to one tesseract run per page so one bad page doesn't lose the batch
+            print(f"Warning: batch OCR failed for pages {batch[0]}-{batch[-1]}: {e}")
+            texts = []
+            for page_idx, img_filename in rendered:
+                try:
+                    texts.append((await run_tesseract_async(img_filename)).strip())
+                except Exception as e:
+                    print(f"Warning: OCR failed for page {page_idx}: {e}")
+                    texts.append("")
+
+        if progress_cb is not None:
+            for page_idx in batch:
+                progress_cb(page_idx, page_count)
+        return [f"Page {page_idx} (OCR): {text}" for (page_idx, _), text in zip(rendered, texts) if text]
+
+    batch_runs = await asyncio.gather(
+        *(ocr_batch(pages[start:start + batch_size]) for start in range(0, len(pages), batch_size))
+    )
+    return [text_run for text_runs in batch_runs for text_run in text_runs]
+
+
+def render_and_ocr_pdf_page(pdf_path, page_idx, ocr=True):
+    """
+    Render and OCR a single PDF page, returning the page image as PNG bytes.
+    
+    Like ocr_pdf_page, but leaves writing the image to the caller.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_idx: 1-based page number
+        ocr: Whether to OCR the page; born-digital pages are only rendered
+        
+    Returns:
+        tuple: (text run or None, PNG bytes or None if the page failed to render)
+    """
+    try:
+        image = render_page(pdf_path, page_idx)
+    except Exception as e:
+        print(f"Warning: Failed to render page {page_idx} of PDF: {e}")
+        return None, None
+
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG", compress_level=PNG_COMPRESS_LEVEL)
+
+    return ocr_page_text_run(image, page_idx) if ocr else None, buffer.getvalue()
+
+
+def ocr_page_text_run(image, page_idx):
+    """
+    OCR a rendered page into a text run.
+    
+    Args:
+        image: PIL image of the page
+        page_idx: 1-based page number
+        
+    Returns:
+        str or None: "Page N (OCR): ..." text run, or None if nothing was found
+    """
+    try:
+        text_from_image = ocr_page(image)
+        if text_from_image:
+            return f"Page {page_idx} (OCR): {text_from_image}"
     except Exception as e:
-        print(f"Warning: Failed to extract images from PDF: {e}")
+        print(f"Warning: OCR failed for page {page_idx}: {e}")
+    return None
+
+
+def iter_pdf_elements(pdf_path, images_dir=None, progress_cb=None, max_workers=1):
+    """
+    Yield text, tables, and OCR from PDF as tagged records, as they are produced.
+    
+    Embedded text and tables come first, followed by the OCR text runs of
+    scanned pages in page order. Born-digital pages are not OCR'd, but their
+    page images are saved like the others.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        images_dir: Directory to save page images (optional; pages are OCR'd either way)
+        progress_cb: Optional callback(page_idx, page_count) called after each page is OCR'd
+        max_workers: Number of processes used to OCR pages in parallel (1 = in this
+            process, running up to OCR_CONCURRENCY batched tesseract subprocesses)
+        
+    Yields:
+        tuple: ("text", text_run) or ("table", table_html)
+    """
+    # 1) Partition PDF into text + tables
+    page_text_chars = {}
+    yield from iter_pdf_element_records(pdf_path, page_text_chars)
+    text_pages = get_text_pages(page_text_chars)
 
+    # 2) Render and OCR PDF pages
+    try:
+        page_count = get_pdf_page_count(pdf_path)
+    except Exception as e:
+        print(f"Warning: Failed to read page count of PDF: {e}")
+        page_count = 0
+
+    # Only scanned pages need OCR; born-digital pages already have their text
+    pages = [page_idx for page_idx in range(1, page_count + 1) if page_idx not in text_pages]
+    workers = min(max_workers, len(pages))
+    if workers > 1:
+        # Pages are independent, so OCR them across processes; map keeps page order
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_ocr_process) as pool:
+            page_runs = pool.map(ocr_pdf_page, repeat(pdf_path), pages, repeat(images_dir))
+            for page_idx, text_run in zip(pages, page_runs):
+                if text_run:
+                    yield "text", text_run
+                if progress_cb is not None:
+                    progress_cb(page_idx, page_count)
+    elif pages:
+        for text_run in asyncio.run(ocr_pdf_pages(pdf_path, pages, page_count, images_dir, progress_cb)):
+            yield "text", text_run
+
+    # Born-digital pages are not OCR'd, but still get their page image
+    if images_dir is not None:
+        image_pages = [page_idx for page_idx in range(1, page_count + 1) if page_idx in text_pages]
+        if min(RENDER_WORKERS, len(image_pages)) > 1:
+            list(get_render_pool().map(save_page_image, repeat(pdf_path), image_pages, repeat(images_dir)))
+        else:
+            for page_idx in image_pages:
+                save_page_image(pdf_path, page_idx, images_dir)
+
+
+def extract_pdf_text_tables_images(pdf_path, images_dir=None, progress_cb=None, max_workers=1):
+    """
+    Extract text, tables, and OCR from PDF.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        images_dir: Directory to save page images (optional; pages are OCR'd either way)
+        progress_cb: Optional callback(page_idx, page_count) called after each page is OCR'd
+        max_workers: Number of processes used to OCR pages in parallel (see iter_pdf_elements)
+        
+    Returns:
+        tuple: (text_runs, tables_html)
+    """
+    text_runs = []
+    tables_html = []
+    # Bound appends, looked up once rather than per record
+    append = {"text": text_runs.append, "table": tables_html.append}
+    for kind, content in iter_pdf_elements(pdf_path, images_dir, progress_cb, max_workers):
+        append[kind](content)
     return text_runs, tables_html
 
 
@@ -114,8 +589,8 @@ def main(args=None):
     source_path = Path(args.pdf_file)
     base_name = source_path.stem  # filename without extension
     
-    # In stdout mode, we still need a temp dir for images during processing
-    # but we won't write the text files to disk
+    # In stdout mode nothing is written to disk; pages are OCR'd from memory
+    images_dir = None
     if not stdout_mode:
         # Ensure output directory exists when not in stdout mode
         out_dir = Path(args.out_dir)
@@ -123,28 +598,26 @@ def main(args=None):
         
         out_text = out_dir / f"{base_name}.txt"
         out_tables = out_dir / f"{base_name}_tables.html"
-        images_dir = out_dir / base_name
+        images_dir = str(out_dir / base_name)
 
         if verbose:
             print(f"Processing PDF file: {args.pdf_file}")
             print(f"Output directory: {out_dir}")
-    else:
-        # For stdout mode, we still need a temp dir for images
-        import tempfile
-        temp_dir = tempfile.mkdtemp(prefix="ocr_convert_")
-        images_dir = Path(temp_dir) / base_name
+    elif verbose:
+        print(f"Processing PDF file: {args.pdf_file}")
+        print("Output mode: stdout")
         
-        if verbose:
-            print(f"Processing PDF file: {args.pdf_file}")
-            print(f"Temp directory for images: {images_dir}")
-        
-    texts, tables = extract_pdf_text_tables_images(args.pdf_file, images_dir=str(images_dir))
+    records = iter_pdf_elements(args.pdf_file, images_dir=images_dir)
 
     if stdout_mode:
-        # Output text content to stdout
-        for t in texts:
-            print(t.strip())
-            print()
+        # Output text content to stdout as it is produced
+        tables = []
+        for kind, content in records:
+            if kind == "table":
+                tables.append(content)
+            else:
+                print(content.strip())
+                print()
             
         if tables and verbose:
             print("\n=== Tables (HTML format) ===")
@@ -152,15 +625,15 @@ def main(args=None):
                 print(html)
                 print()
     else:
-        # Write out all text runs to file
-        with open(out_text, "w", encoding="utf-8") as f:
-            for t in texts:
-                f.write(t.strip() + "\n\n")
-
-        # Write out tables as HTML
-        with open(out_tables, "w", encoding="utf-8") as f:
-            for html in tables:
-                f.write(html + "\n\n")
+        # Write out text runs and tables as HTML as they are produced, through
+        # large buffers so many small records don't each cost a write() call
+        with open(out_text, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as text_file, \
+                open(out_tables, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as tables_file:
+            for kind, content in records:
+                if kind == "table":
+                    tables_file.write(content + "\n\n")
+                else:
+                    text_file.write(content.strip() + "\n\n")
 
         print(f"Done. Text → {out_text}; Tables → {out_tables}; Images → {images_dir}")
 
@@ -15,48 +15,95 @@ Requirements:
 
 import subprocess
 import argparse
+import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from pptx import Presentation
-from pptx.enum.shapes import MSO_SHAPE_TYPE
-from unstructured.partition.pptx import partition_pptx
-from unstructured.partition.image import partition_image
-from unstructured.documents.elements import Table
 
+from src.utils.tables import TABLE_HTML_PLACEHOLDER, get_table_html_getter
+from src.utils.tesseract import OCR_CORE_BUDGET
 
-def extract_pptx_text_tables_images(pptx_path, images_dir=None):
+# python-pptx and unstructured are imported inside the functions that use them,
+# so the CLI's --help and argument errors don't pay for loading them
+
+# Number of slide images OCR'd concurrently, each in its own tesseract process,
+# defaulting to this worker's share of the cores
+OCR_CONCURRENCY = int(os.getenv("OCR_CONCURRENCY", str(OCR_CORE_BUDGET)))
+
+
+def extract_pptx_elements(pptx_path):
     """
     Returns:
         text_runs   : list of strings (all text from text boxes, titles, etc.)
         tables_html : list of HTML strings (one per table)
     """
-    # 1) Partition PPTX into text + tables
+    from unstructured.partition.pptx import partition_pptx
+    from unstructured.documents.elements import Table
+
     elements = partition_pptx(filename=pptx_path)
-    text_runs = []
-    tables_html = []
-
-    for el in elements:
-        if isinstance(el, Table):
-            # Render table as HTML
-            try:
-                # Try to get HTML from metadata first
-                html = getattr(el.metadata, 'text_as_html', None)
-                if not html:
-                    # Fallback to converting table data to HTML
-                    html = "<table>"
-                    if hasattr(el, 'metadata') and hasattr(el.metadata, 'text_as_html'):
-                        html = el.metadata.text_as_html
-                    else:
-                        # Create basic HTML table from table data
-                        html = "<table><tr><td>Table content</td></tr></table>"
-            except Exception as e:
-                print(f"Warning: failed to render table as HTML: {e}")
-                html = "<table><tr><td>Table content (rendering failed)</td></tr></table>"
-            tables_html.append(html)
-        else:
-            text_runs.append(el.text)
+    table_html = get_table_html_getter()
+
+    # Classify each element once with an exact type check, then split the
+    # texts and tables in two comprehension passes
+    is_table = [type(el) is Table for el in elements]
+    text_runs = [el.text for el, table in zip(elements, is_table) if not table]
+    tables_html = [
+        # Render table as HTML, falling back to a placeholder when none was inferred
+        table_html(el) or TABLE_HTML_PLACEHOLDER
+        for el, table in zip(elements, is_table) if table
+    ]
+
+    return text_runs, tables_html
+
+
+def convert_vector_images(image_paths, out_dir):
+    """
+    Convert WMF/EMF images to PNG with a single headless LibreOffice run.
 
-    # 2) Extract and OCR images (with WMF/EMF conversion)
+    Each PNG is written to out_dir under the source file's base name; callers
+    check for it to find out which conversions succeeded.
+
+    Args:
+        image_paths: Paths of the WMF/EMF files to convert
+        out_dir: Directory to write the PNG files to
+    """
+    try:
+        result = subprocess.run([
+            "libreoffice", "--headless",
+            "--convert-to", "png",
+            "--outdir", str(out_dir),
+            *image_paths
+        ], check=True, capture_output=True, text=True)
+        print(f"Converted {len(image_paths)} WMF/EMF image(s) to PNG")
+        if result.stderr:
+            print(f"LibreOffice errors: {result.stderr}")
+    except subprocess.CalledProcessError as e:
+        print(f"Warning: LibreOffice conversion failed: {e}")
+        print(f"LibreOffice output: {e.stdout}")
+        if e.stderr:
+            print(f"LibreOffice errors: {e.stderr}")
+    except Exception as e:
+        print(f"Warning: unexpected error during WMF/EMF conversion: {e}")
+
+
+def extract_pptx_images(pptx_path, images_dir=None):
+    """
+    Write embedded slide images to disk, converting WMF/EMF to PNG.
+
+    Every occurrence is written, but an image reused across slides (logos,
+    template art) is converted only once and all its occurrences share the
+    first one's raster path, so callers can OCR each unique path once.
+
+    Returns:
+        list of paths to raster images ready for OCR, one per occurrence in slide order
+    """
+    from pptx import Presentation
+    from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+    # First pass: write every picture blob to disk, remembering slide order
+    # and the first file written for each distinct blob
+    extracted = []
+    first_for_blob = {}
     prs = Presentation(pptx_path)
     for slide_idx, slide in enumerate(prs.slides, start=1):
         for shape_idx, shape in enumerate(slide.shapes, start=1):
@@ -71,58 +118,89 @@ def extract_pptx_text_tables_images(pptx_path, images_dir=None):
                             img_filename = os.path.join(images_dir, f"slide{slide_idx}_img{shape_idx}.{ext}")
                         else:
                             img_filename = f"slide{slide_idx}_img{shape_idx}.{ext}"
+                        blob = img.blob
                         with open(img_filename, "wb") as fp:
-                            fp.write(img.blob)
-
-                        # Convert WMF/EMF via LibreOffice
-                        if ext in ("wmf", "emf"):
-                            base = os.path.splitext(img_filename)[0]
-                            png_filename = f"{base}.png"
-                            try:
-                                # Run LibreOffice conversion
-                                result = subprocess.run([
-                                    "libreoffice", "--headless",
-                                    "--convert-to", "png",
-                                    "--outdir", images_dir if images_dir else os.getcwd(),
-                                    img_filename
-                                ], check=True, capture_output=True, text=True)
-                                
-                                # Check if the PNG file was actually created
-                                if os.path.isfile(png_filename):
-                                    img_to_ocr = png_filename
-                                    print(f"Successfully converted {img_filename} to {png_filename}")
-                                else:
-                                    print(f"Warning: LibreOffice conversion completed but {png_filename} not found")
-                                    print(f"LibreOffice output: {result.stdout}")
-                                    if result.stderr:
-                                        print(f"LibreOffice errors: {result.stderr}")
-                                    print(f"Skipping OCR for {img_filename} - conversion failed")
-                                    # Skip OCR for this image since conversion failed
-                                    continue
-                            except subprocess.CalledProcessError as e:
-                                print(f"Warning: LibreOffice conversion failed for {img_filename}: {e}")
-                                print(f"LibreOffice output: {e.stdout}")
-                                if e.stderr:
-                                    print(f"LibreOffice errors: {e.stderr}")
-                                print(f"Skipping OCR for {img_filename} - conversion failed")
-                                continue
-                            except Exception as e:
-                                print(f"Warning: unexpected error during conversion of {img_filename}: {e}")
-                                print(f"Skipping OCR for {img_filename} - conversion failed")
-                                continue
-                        else:
-                            img_to_ocr = img_filename
-
-                        # OCR the raster image
-                        try:
-                            img_elements = partition_image(filename=img_to_ocr)
-                            for img_el in img_elements:
-                                text_runs.append(img_el.text)
-                        except Exception as e:
-                            print(f"Warning: OCR failed for {img_to_ocr}: {e}")
+                            fp.write(blob)
+                        key = hashlib.blake2b(blob, digest_size=16).digest()
+                        first = first_for_blob.setdefault(key, img_filename)
+                        extracted.append((first, ext))
                 except Exception as e:
                     print(f"Warning: failed to extract image from shape: {e}")
 
+    # Convert all WMF/EMF images in one LibreOffice run, so the runtime
+    # starts once per deck rather than once per image
+    wmf_batch = list(dict.fromkeys(p for p, ext in extracted if ext in ("wmf", "emf")))
+    if wmf_batch:
+        convert_vector_images(wmf_batch, images_dir if images_dir else os.getcwd())
+
+    images_to_ocr = []
+    for img_filename, ext in extracted:
+        if ext in ("wmf", "emf"):
+            png_filename = f"{os.path.splitext(img_filename)[0]}.png"
+            if not os.path.isfile(png_filename):
+                print(f"Warning: LibreOffice conversion did not produce {png_filename}")
+                print(f"Skipping OCR for {img_filename} - conversion failed")
+                continue
+            images_to_ocr.append(png_filename)
+        else:
+            images_to_ocr.append(img_filename)
+
+    return images_to_ocr
+
+
+def ocr_image_file(image_path):
+    """
+    OCR a raster image file.
+
+    Returns:
+        list of strings extracted from the image (empty if OCR failed)
+    """
+    from unstructured.partition.image import partition_image
+
+    try:
+        # OCR only: slide images are read as plain text, without the layout model
+        elements = partition_image(filename=image_path, strategy="ocr_only", languages=["eng"])
+        return [img_el.text for img_el in elements]
+    except Exception as e:
+        print(f"Warning: OCR failed for {image_path}: {e}")
+        return []
+
+
+def extract_pptx_text_tables_images(pptx_path, images_dir=None, progress_cb=None):
+    """
+    progress_cb, if given, is called as progress_cb(image_idx, image_count)
+    after each extracted image is OCR'd.
+
+    Returns:
+        text_runs   : list of strings (all text from text boxes, titles, etc.)
+        tables_html : list of HTML strings (one per table)
+    """
+    # 1) Partition PPTX into text + tables
+    text_runs, tables_html = extract_pptx_elements(pptx_path)
+
+    # 2) Extract images (with WMF/EMF conversion)
+    image_paths = extract_pptx_images(pptx_path, images_dir)
+    if not image_paths:
+        return text_runs, tables_html
+
+    # Images reused across slides share a path; OCR each one once
+    images_to_ocr = list(dict.fromkeys(image_paths))
+
+    # 3) OCR the images concurrently; they are independent and each OCR runs
+    # in a tesseract subprocess, so threads scale until the cores are busy
+    max_workers = min(OCR_CONCURRENCY, len(images_to_ocr))
+    image_texts = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(ocr_image_file, images_to_ocr)
+        for image_idx, (image_path, texts) in enumerate(zip(images_to_ocr, results), start=1):
+            image_texts[image_path] = texts
+            if progress_cb is not None:
+                progress_cb(image_idx, len(images_to_ocr))
+
+    # Repeat the text for every occurrence, in slide order
+    for image_path in image_paths:
+        text_runs.extend(image_texts[image_path])
+
     return text_runs, tables_html
 
 
@@ -196,15 +274,13 @@ def main(args=None):
                 print(html)
                 print()
     else:
-        # Write out all text runs to file
+        # Write out all text runs to file in a single write
         with open(out_text, "w", encoding="utf-8") as f:
-            for t in texts:
-                f.write(t.strip() + "\n\n")
+            f.write("".join(t.strip() + "\n\n" for t in texts))
 
         # Write out tables as HTML
         with open(out_tables, "w", encoding="utf-8") as f:
-            for html in tables:
-                f.write(html + "\n\n")
+            f.write("".join(html + "\n\n" for html in tables))
 
         print(f"Done. Text → {out_text}; Tables → {out_tables}; Images → {images_dir}")
 
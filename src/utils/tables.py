@@ -0,0 +1,30 @@
+"""
+tables.py
+
+Table HTML lookup shared by the PDF and PowerPoint parsers.
+"""
+
+from functools import cache
+from operator import attrgetter
+
+# Stand-in for tables the partitioner found but could not render as HTML
+TABLE_HTML_PLACEHOLDER = "<table><tr><td>Table content</td></tr></table>"
+
+
+@cache
+def get_table_html_getter():
+    """
+    Pick how to read a table element's HTML, once per process.
+
+    The metadata shape only depends on the installed unstructured version, so
+    the per-table lookup is specialized to a plain attribute getter up front.
+
+    Returns:
+        callable: Function of a table element returning its HTML or None
+    """
+    from unstructured.documents.elements import ElementMetadata
+
+    if hasattr(ElementMetadata(), "text_as_html"):
+        return attrgetter("metadata.text_as_html")
+    print("Warning: unstructured element metadata has no text_as_html; tables use a placeholder")
+    return lambda el: getattr(el.metadata, "text_as_html", None)
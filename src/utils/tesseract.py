@@ -0,0 +1,66 @@
+"""
+tesseract.py
+
+Tesseract settings and the optional in-process engine shared by the image and PDF parsers.
+
+Optional:
+    pip install tesserocr  # in-process engine, avoids a tesseract subprocess per image or page
+"""
+
+import os
+import threading
+
+# LSTM engine only, and treat each image or page as one uniform block of text,
+# skipping the legacy recognizer and full page layout analysis. Set
+# TESSERACT_PSM=3 for documents with mixed multi-column layouts.
+TESSERACT_OEM = int(os.getenv("TESSERACT_OEM", "1"))
+TESSERACT_PSM = int(os.getenv("TESSERACT_PSM", "6"))
+TESSERACT_CONFIG = f"--oem {TESSERACT_OEM} --psm {TESSERACT_PSM}"
+
+# OCR jobs run side by side in OCR_WORKERS processes (default: one per CPU), so the
+# parallelism within a single job defaults to one worker's share of the cores
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+OCR_CORE_BUDGET = max(1, (os.cpu_count() or 1) // OCR_WORKERS)
+
+# Tesseract engine handles are not thread-safe, so each thread loads its own once
+_tess_local = threading.local()
+
+
+def get_tess_api():
+    """
+    Get this thread's in-process Tesseract engine, loading the language model on first use.
+
+    Returns:
+        tesserocr.PyTessBaseAPI or None: Engine handle, or None if tesserocr is not installed
+    """
+    api = getattr(_tess_local, "api", None)
+    if api is None:
+        try:
+            import tesserocr
+        except ImportError:
+            return None
+        api = _tess_local.api = tesserocr.PyTessBaseAPI(
+            lang="eng", oem=TESSERACT_OEM, psm=TESSERACT_PSM
+        )
+    return api
+
+
+def limit_ocr_threads():
+    """
+    Limit tesseract to one OpenMP thread in this process and its subprocesses.
+
+    Parallelism comes from running several OCR tasks side by side, so call this
+    once at process start or from a pool initializer, before any OCR runs.
+    """
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def init_ocr_process():
+    """
+    Prepare a pool worker running beside other OCR workers.
+
+    Limits tesseract to one OpenMP thread and loads the in-process engine,
+    if installed, before the first task arrives.
+    """
+    limit_ocr_threads()
+    get_tess_api()
@@ -0,0 +1,49 @@
+"""
+thumbnails.py
+
+Small WebP previews of extracted page and slide images, served by the APIs
+instead of the full-resolution files.
+
+Requirements:
+    pip install Pillow
+"""
+
+import os
+import tempfile
+
+from PIL import Image
+
+# Largest thumbnail width and height, matching the frontends' image grid
+THUMBNAIL_SIZE = (300, 300)
+
+
+def make_thumbnail(image_path, thumb_path, size=THUMBNAIL_SIZE):
+    """
+    Write a WebP thumbnail of an image.
+
+    The file is written under a temporary name and moved into place, so
+    concurrent requests never serve a partially written thumbnail.
+
+    Args:
+        image_path: Path to the source image
+        thumb_path: Path to write the thumbnail to
+        size: Maximum (width, height) of the thumbnail
+    """
+    os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+    # Unique per call, since both APIs generate thumbnails from a thread pool
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(thumb_path), suffix=".tmp", delete=False
+    ) as tmp:
+        tmp_path = tmp.name
+        try:
+            with Image.open(image_path) as image:
+                image.thumbnail(size)
+                if image.mode not in ("RGB", "RGBA"):
+                    image = image.convert("RGBA")
+                image.save(tmp, "WEBP")
+        except BaseException:
+            tmp.close()
+            os.remove(tmp_path)
+            raise
+
+    os.replace(tmp_path, thumb_path)
@@ -3,7 +3,11 @@
 Simplified FastAPI app for testing.
 """
 
+import hashlib
+import os
+
 from fastapi import FastAPI, File, Form, UploadFile
+from fastapi.responses import ORJSONResponse
 import uvicorn
 
 # Create FastAPI application
@@ -11,8 +15,12 @@ app = FastAPI(
     title="Test API",
     description="Test API for debugging",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
+# Chunk size used when reading uploads
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 @app.get("/")
 async def root():
     return {"status": "ok", "message": "Test API is running"}
@@ -23,10 +31,31 @@ async def hello():
 
 @app.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
+    # Read the upload in chunks, sizing and hashing it without holding it in memory
+    size = 0
+    digest = hashlib.sha256()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        digest.update(chunk)
+    
     return {
         "filename": file.filename,
         "content_type": file.content_type,
+        "size": size,
+        "sha256": digest.hexdigest(),
     }
 
 if __name__ == "__main__":
-    uvicorn.run("test_api:app", host="0.0.0.0", port=8001, reload=True)
\ No newline at end of file
+    if os.getenv("OWL_DEV"):
+        # Development: single process that reloads on code changes
+        uvicorn.run("test_api:app", host="0.0.0.0", port=8001, reload=True)
+    else:
+        # Benchmarking and CI: one worker per CPU on the uvloop/httptools implementations
+        uvicorn.run(
+            "test_api:app",
+            host="0.0.0.0",
+            port=8001,
+            workers=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))),
+            loop="uvloop",
+            http="httptools",
+        )